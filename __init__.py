@@ -1,12 +1,17 @@
 from __future__ import annotations
 import logging
+import time
+from aiohttp import CookieJar
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from .const import DOMAIN, PLATFORMS, DEFAULT_BASE_URL, CONF_TENANT, CONF_USERNAME, CONF_PASSWORD
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.storage import Store
+from .const import DOMAIN, PLATFORMS, DEFAULT_BASE_URL, CONF_TENANT, CONF_USERNAME, CONF_PASSWORD, STORAGE_VERSION, STORAGE_KEY_SESSION, STORAGE_KEY_SCHEDULE, DATA_THROTTLE, DATA_BREAKER, DATA_PENDING_SESSIONS, PENDING_SESSION_TTL
+from .history import StatisticsImporter
 from .coordinator import SMSNetCoordinator
 from .api import SMSNetClient
+from .throttle import CircuitBreaker, HostThrottle
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,16 +32,33 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    session = async_get_clientsession(hass)
+    # Sessão própria por entrada: com o cookie jar partilhado, o login de uma conta terminava a sessão das outras
+    session = async_create_clientsession(hass, cookie_jar=CookieJar())
     tenant = entry.data[CONF_TENANT]
     username = entry.data[CONF_USERNAME]
     password = entry.data[CONF_PASSWORD]
     base_url = DEFAULT_BASE_URL
 
-    client = SMSNetClient(session, base_url, tenant, username, password, _LOGGER)
-    coordinator = SMSNetCoordinator(hass, client, logger=_LOGGER)
+    # Throttle e disjuntor por domínio: todas as contas partilham o mesmo portal
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    throttle = domain_data.setdefault(DATA_THROTTLE, HostThrottle())
+    breaker = domain_data.setdefault(DATA_BREAKER, CircuitBreaker())
+    client = SMSNetClient(session, base_url, tenant, username, password, _LOGGER, throttle=throttle, breaker=breaker)
+    store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_SESSION}.{entry.entry_id}", private=True)
+    importer = StatisticsImporter(hass, entry.entry_id, entry.title)
+    schedule_store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_SCHEDULE}.{entry.entry_id}")
+    coordinator = SMSNetCoordinator(hass, client, logger=_LOGGER, store=store, importer=importer, schedule_store=schedule_store)
+    await coordinator.async_restore_schedule()
 
-    await coordinator.async_config_entry_first_refresh()
+    # Sessão validada pelo config flow (user/reauth/import) evita um segundo login
+    pending = domain_data.get(DATA_PENDING_SESSIONS, {}).pop(client.account_id, None)
+    if pending and time.monotonic() - pending[0] < PENDING_SESSION_TTL.total_seconds() and client.adopt_session(pending[1]):
+        # Conta acabada de configurar: o utilizador espera ver dados já
+        _LOGGER.debug("SMSNET reusing session from config flow for %s", tenant)
+        await coordinator.async_config_entry_first_refresh()
+    else:
+        # Arranque do HA: a primeira atualização fica desfasada por entrada em vez de bloquear o setup
+        coordinator.schedule_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
         "client": client,
@@ -51,3 +73,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id, None)
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_SESSION}.{entry.entry_id}").async_remove()
+    await Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_SCHEDULE}.{entry.entry_id}").async_remove()
+    await StatisticsImporter(hass, entry.entry_id, entry.title).async_remove()
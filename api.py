@@ -1,86 +1,314 @@
 from __future__ import annotations
-import re, json
-from typing import Any, Dict, Optional, List, Tuple
+import asyncio, codecs, logging, json, time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, List, Tuple
 from urllib.parse import urljoin
-from aiohttp import ClientSession
+from http.cookies import SimpleCookie
+from aiohttp import ClientError, ClientSession, ClientTimeout
+from yarl import URL
+from .htmlscan import LoginFormScanner, TokenScanner
+from .metrics import ClientMetrics
+ROUTE_TTL = 24 * 3600
+ROUTE_NEGATIVE_TTL = 3600
+REQUEST_TIMEOUT = 30.0
+REQUESTS_PER_REFRESH = 9
+TRANSIENT_RETRIES = 2
+TRANSIENT_RETRY_DELAY = 0.5
+SCAN_CHUNK = 4096
+ENDPOINTS = {
+    "last_reading": "get_last_reading",
+    "consumptions": "get_consumptions_graph",
+    "billed": "get_billed_graph",
+    "billing_info": "get_billing_info",
+}
+class _Deadline:
+    # Prazo de uma atualização; só cresce, quando a fila partilhada do throttle pede mais tempo
+    __slots__ = ("started", "seconds", "at")
+    def __init__(self, seconds: float) -> None:
+        self.started = time.monotonic(); self.seconds = seconds; self.at = self.started + seconds
+    def remaining(self, allowance: float = 0.0) -> float:
+        self.at = max(self.at, self.started + self.seconds + allowance)
+        return self.at - time.monotonic()
+_DEADLINE: ContextVar[Optional[_Deadline]] = ContextVar("smsnet_deadline", default=None)
+class SMSNetError(Exception):
+    pass
+class SMSNetAuthError(SMSNetError):
+    pass
+class SMSNetServerError(SMSNetError):
+    pass
+class SMSNetTimeoutError(SMSNetError):
+    pass
+class SMSNetParseError(SMSNetError):
+    pass
+class SMSNetNotFoundError(SMSNetError):
+    pass
+class SMSNetCircuitOpenError(SMSNetServerError):
+    pass
+class SMSNetLoginError(SMSNetAuthError):
+    pass
+class RouteCache:
+    def __init__(self, ttl: float = ROUTE_TTL, negative_ttl: float = ROUTE_NEGATIVE_TTL) -> None:
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._good: Dict[Tuple[str, ...], Tuple[str, float]] = {}
+        self._bad: Dict[str, float] = {}
+    def order(self, paths: List[str]) -> List[str]:
+        now = time.monotonic(); key = tuple(paths)
+        good = self._good.get(key)
+        if good and now - good[1] > self._ttl: self._good.pop(key, None); good = None
+        for p in [p for p, ts in self._bad.items() if now - ts > self._negative_ttl]: self._bad.pop(p, None)
+        first = [good[0]] if good and good[0] in paths else []
+        rest = [p for p in paths if p not in first]
+        # Caminhos que falharam recentemente ficam no fim, só como último recurso
+        return first + [p for p in rest if p not in self._bad] + [p for p in rest if p in self._bad]
+    def mark_good(self, paths: List[str], path: str) -> None:
+        self._good[tuple(paths)] = (path, time.monotonic()); self._bad.pop(path, None)
+    def mark_bad(self, paths: List[str], path: str) -> None:
+        self._bad[path] = time.monotonic()
+        good = self._good.get(tuple(paths))
+        if good and good[0] == path: self._good.pop(tuple(paths), None)
+    def as_dict(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "resolved": {" | ".join(k): {"path": p, "age_s": round(now - ts)} for k, (p, ts) in self._good.items()},
+            "failed": {p: {"age_s": round(now - ts)} for p, ts in self._bad.items()},
+        }
 class SMSNetClient:
-    def __init__(self, session: ClientSession, base_url: str, tenant: str, username: str, password: str, logger) -> None:
+    def __init__(self, session: ClientSession, base_url: str, tenant: str, username: str, password: str, logger, throttle=None, breaker=None) -> None:
         self._session = session
+        self._throttle = throttle
+        self._breaker = breaker
         self._base = base_url.rstrip("/")
         self._tenant = tenant.strip("/")
         self._username = username
         self._password = password
-        self._logger = logger
+        self._logger = logger or logging.getLogger(__name__)
+        self.metrics = ClientMetrics()
         self._rvt: Optional[str] = None
+        self._auth_lock = asyncio.Lock()
+        self._reauth_task: Optional[asyncio.Future] = None
+        self._auth_gen = 0
+        self._login_gen = -1
+        self._pair_tokens = False
+        self.routes = RouteCache()
     def _url(self, path: str) -> str:
         return f"{self._base}/{self._tenant}/{path.lstrip('/')}"
+    def _endpoint(self, url: str) -> str:
+        return url.split(f"/{self._tenant}/", 1)[-1].split("?", 1)[0]
+    @contextmanager
+    def deadline(self, seconds: float):
+        token = _DEADLINE.set(_Deadline(seconds))
+        if self._throttle is not None: self._throttle.begin_refresh(self.account_id)
+        try: yield
+        finally:
+            _DEADLINE.reset(token)
+            if self._throttle is not None: self._throttle.end_refresh(self.account_id)
+    def _remaining(self, deadline: _Deadline) -> float:
+        # Com muitas contas a atualizar ao mesmo tempo a espera na fila cresce com elas
+        allowance = self._throttle.allowance(REQUESTS_PER_REFRESH) if self._throttle is not None else 0.0
+        return deadline.remaining(allowance)
+    @asynccontextmanager
+    async def _request(self, method: str, url: str, **kwargs) -> AsyncIterator[Any]:
+        deadline = _DEADLINE.get(); wait = None
+        if deadline is not None:
+            wait = self._remaining(deadline)
+            if wait <= 0: raise SMSNetTimeoutError(f"{method} {url}: refresh deadline exceeded")
+        if self._breaker is not None and not self._breaker.allow():
+            raise SMSNetCircuitOpenError(f"{method} {url}: portal circuit open")
+        slot = self._throttle.slot(self.account_id) if self._throttle is not None else nullcontext()
+        sent = False; outcome = None; started = 0.0
+        try:
+            # A espera na fila só conta para o prazo da atualização; o REQUEST_TIMEOUT começa quando o pedido sai
+            async with asyncio.timeout(wait) as scope:
+                async with slot:
+                    budget = REQUEST_TIMEOUT if deadline is None else min(REQUEST_TIMEOUT, self._remaining(deadline))
+                    if budget <= 0: raise TimeoutError()
+                    scope.reschedule(asyncio.get_running_loop().time() + budget)
+                    sent = True; started = time.monotonic()
+                    async with self._session.request(method, url, timeout=ClientTimeout(total=budget), **kwargs) as resp:
+                        if resp.status >= 500 or resp.status == 429:
+                            outcome = False; raise SMSNetServerError(f"{method} {url} failed: {resp.status}")
+                        outcome = True
+                        if resp.status in (400, 401, 403): raise SMSNetAuthError(f"{method} {url} rejected: {resp.status}")
+                        if resp.status == 404: raise SMSNetNotFoundError(f"{method} {url} not found")
+                        if resp.status >= 400: raise SMSNetError(f"{method} {url} failed: {resp.status}")
+                        yield resp
+        except TimeoutError as e:
+            # Só conta para o disjuntor se o pedido chegou a sair (não se ficou na fila)
+            if sent and outcome is None: outcome = False
+            raise SMSNetTimeoutError(f"{method} {url} timed out") from e
+        except ClientError as e:
+            if outcome is None: outcome = False
+            raise SMSNetServerError(f"{method} {url}: {e}") from e
+        finally:
+            if sent: self.metrics.observe(self._endpoint(url), time.monotonic() - started, outcome is True)
+            if self._breaker is not None:
+                if outcome is True: self._breaker.record_success()
+                elif outcome is False: self._breaker.record_failure()
+                else: self._breaker.abandon()
+    async def _read_text(self, resp, url: str) -> str:
+        body = await resp.read()
+        self.metrics.observe_size(self._endpoint(url), len(body))
+        return body.decode(resp.get_encoding(), errors="replace")
     async def _fetch(self, method: str, url: str, **kwargs):
         self._logger.debug("SMSNET %s %s", method, url)
-        async with self._session.request(method, url, **kwargs) as resp:
-            text = await resp.text()
-            self._logger.debug("SMSNET %s %s -> %s head=%s", method, url, resp.status, text[:250])
+        async with self._request(method, url, **kwargs) as resp:
+            text = await self._read_text(resp, url)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug("SMSNET %s %s -> %s head=%s", method, url, resp.status, text[:250])
             return resp, text
-    async def _get_login_page(self) -> Tuple[str, str]:
+    async def _scan(self, method: str, url: str, scanner, **kwargs):
+        # Lê o HTML aos bocados e fecha a ligação assim que o scanner encontrou o que procura
+        self._logger.debug("SMSNET %s %s (scan)", method, url)
+        async with self._request(method, url, **kwargs) as resp:
+            if resp.status in (301, 302, 303): return resp
+            decoder = codecs.getincrementaldecoder(resp.charset or "utf-8")(errors="replace")
+            size = 0
+            async for chunk in resp.content.iter_chunked(SCAN_CHUNK):
+                size += len(chunk); scanner.feed(decoder.decode(chunk))
+                if scanner.done: break
+            else:
+                scanner.feed(decoder.decode(b"", final=True)); scanner.close()
+            self.metrics.observe_size(self._endpoint(url), size)
+            self._logger.debug("SMSNET %s %s -> %s scanned=%s bytes done=%s", method, url, resp.status, size, scanner.done)
+            if scanner.done: resp.close()
+            return resp
+    async def _get_login_page(self) -> Tuple[str, LoginFormScanner]:
         login_url = self._url("Account/Login")
         headers = {"User-Agent": "HomeAssistant", "Accept-Language": "pt-PT,pt;q=0.9,en;q=0.8"}
-        resp, text = await self._fetch("GET", login_url, headers=headers)
-        if resp.status >= 400:
-            raise Exception(f"Login GET failed: {resp.status}")
-        return login_url, text
-    def _parse_login_form(self, base_url: str, html: str) -> Tuple[str, Dict[str, str], str, str]:
-        form_re = re.compile(r'<form[^>]*method=["\\\']?post["\\\']?[^>]*>(.*?)</form>', re.I | re.S)
-        mform = form_re.search(html)
-        if not mform: raise Exception("Login form not found")
-        form_html = mform.group(0)
-        action_m = re.search(r'action=["\\\']([^"\\\']*)["\\\']', form_html, re.I)
-        action = action_m.group(1) if action_m else ""
-        action_url = urljoin(base_url, action) if action else base_url
-        inputs = re.findall(r'<input[^>]*>', form_html, re.I)
+        form = LoginFormScanner()
+        await self._scan("GET", login_url, form, headers=headers)
+        return login_url, form
+    def _parse_login_form(self, base_url: str, form: LoginFormScanner) -> Tuple[str, Dict[str, str], str, str]:
+        if not form.found: raise SMSNetParseError("Login form not found")
+        action_url = urljoin(base_url, form.action) if form.action else base_url
         data: Dict[str, str] = {}
         username_candidates: List[str] = []
         password_name: Optional[str] = None
-        for inp in inputs:
-            name_m = re.search(r'name=["\\\']([^"\\\']+)["\\\']', inp, re.I)
-            if not name_m: continue
-            name = name_m.group(1)
-            type_m = re.search(r'type=["\\\']([^"\\\']+)["\\\']', inp, re.I)
-            itype = (type_m.group(1).lower() if type_m else "text")
-            val_m = re.search(r'value=["\\\']([^"\\\']*)["\\\']', inp, re.I)
-            value = val_m.group(1) if val_m else ""
+        remember_me = False
+        for inp in form.inputs:
+            name = inp.get("name")
+            if not name: continue
+            itype = (inp.get("type") or "text").lower()
+            value = inp.get("value", "")
+            if name == "RememberMe": remember_me = True
             if "__RequestVerificationToken" in name:
                 data[name] = value; continue
             if itype == "password":
                 password_name = name; continue
             if itype == "hidden":
                 data[name] = value; continue
+            if itype in ("checkbox", "submit", "button", "radio"): continue
             username_candidates.append(name)
         user_field = username_candidates[0] if username_candidates else "Email"
         if password_name is None: password_name = "Password"
         data[user_field] = self._username
         data[password_name] = self._password
-        if "RememberMe" in (n for n in data.keys()) or "RememberMe" in html:
+        if remember_me:
             data["RememberMe"] = "true"
         self._logger.debug("SMSNET login form: action=%s user_field=%s pass_field=%s", action_url, user_field, password_name)
         return action_url, data, user_field, password_name
-    async def login_basic(self) -> None:
-        login_url, html = await self._get_login_page()
-        action_url, data, _, _ = self._parse_login_form(login_url, html)
+    async def _post_credentials(self) -> None:
+        login_url, form = await self._get_login_page()
+        action_url, data, _, _ = self._parse_login_form(login_url, form)
         headers = {"Content-Type": "application/x-www-form-urlencoded", "Origin": self._base, "Referer": login_url, "User-Agent": "HomeAssistant"}
         resp, text = await self._fetch("POST", action_url, data=data, headers=headers, allow_redirects=True)
-        if resp.status >= 400: raise Exception(f"Login POST failed: {resp.status}")
+        # O portal volta a mostrar o formulário quando recusa as credenciais; só isto pede nova autenticação.
+        # Falhas depois do POST (token, página de manutenção, 400 antifalsificação) são erros normais
+        if "Account/Login" in resp.url.path: raise SMSNetLoginError("Login rejected: credentials not accepted")
+    async def login_basic(self) -> None:
+        await self._post_credentials()
         await self._refresh_page_token()
     async def login(self) -> None:
-        login_url, html = await self._get_login_page()
-        action_url, data, _, _ = self._parse_login_form(login_url, html)
-        headers = {"Content-Type": "application/x-www-form-urlencoded", "Origin": self._base, "Referer": login_url, "User-Agent": "HomeAssistant"}
-        resp, text = await self._fetch("POST", action_url, data=data, headers=headers, allow_redirects=True)
-        if resp.status >= 400: raise Exception(f"Login POST failed: {resp.status}")
+        async with self._auth_lock:
+            await self._login()
+            self._auth_gen += 1; self._login_gen = self._auth_gen
+            self.metrics.incr("logins")
+    async def _reauth(self, seen_gen: int, full: bool) -> None:
+        # Single-flight: quem chega depois de uma re-autenticação concluída reutiliza o novo _rvt; quem chega
+        # durante uma em curso espera por ela e recebe o mesmo resultado, incluindo a exceção se falhar
+        if self._auth_gen != seen_gen:
+            self._logger.debug("SMSNET reauth skipped, session already renewed (gen=%s)", self._auth_gen)
+            return
+        task = self._reauth_task
+        if task is None:
+            task = self._reauth_task = asyncio.ensure_future(self._run_reauth(seen_gen, full))
+            task.add_done_callback(self._reauth_done)
+        await asyncio.shield(task)
+    def _reauth_done(self, task: asyncio.Future) -> None:
+        if self._reauth_task is task: self._reauth_task = None
+        if not task.cancelled(): task.exception()
+    async def _run_reauth(self, seen_gen: int, full: bool) -> None:
+        async with self._auth_lock:
+            if self._auth_gen != seen_gen:
+                self._logger.debug("SMSNET reauth skipped, session already renewed (gen=%s)", self._auth_gen)
+                return
+            if not full:
+                self.metrics.incr("token_refreshes")
+                try: await self._refresh_page_token()
+                except SMSNetAuthError as e:
+                    self._logger.debug("SMSNET session expired, logging in again: %s", e); full = True
+            if full:
+                self.metrics.incr("relogins"); await self._login()
+            self._auth_gen += 1
+            if full: self._login_gen = self._auth_gen
+    async def _login(self) -> None:
+        await self._post_credentials()
         await self._refresh_page_token()
         try:
             await self._get_json_once("ReadingsAndConsumptions/GetLastReadingInfo", "ReadingsAndConsumptions", pair_tokens=False)
-        except Exception:
+            self._pair_tokens = False
+        except SMSNetAuthError:
             await self._refresh_page_token()
             await self._get_json_once("ReadingsAndConsumptions/GetLastReadingInfo", "ReadingsAndConsumptions", pair_tokens=True)
+            self._pair_tokens = True
+    def export_session(self) -> Dict[str, Any]:
+        host = URL(self._base).host or ""
+        cookies = []
+        for cookie in self._session.cookie_jar:
+            domain = (cookie["domain"] or "").lstrip(".")
+            if domain and not host.endswith(domain): continue
+            cookies.append({"key": cookie.key, "value": cookie.value, "domain": cookie["domain"], "path": cookie["path"] or "/"})
+        return {"rvt": self._rvt, "pair": self._pair_tokens, "cookies": cookies}
+    def adopt_session(self, state: Dict[str, Any]) -> bool:
+        # Sessão acabada de validar noutro cliente (p.ex. no config flow): não precisa de nova verificação
+        if not self.restore_session(state): return False
+        self._auth_gen += 1
+        self.metrics.incr("session_restores")
+        return True
+    def restore_session(self, state: Dict[str, Any]) -> bool:
+        if not state or not state.get("rvt"): return False
+        jar = SimpleCookie()
+        for c in state.get("cookies") or []:
+            jar[c["key"]] = c["value"]
+            if c.get("domain"): jar[c["key"]]["domain"] = c["domain"]
+            jar[c["key"]]["path"] = c.get("path") or "/"
+        self._session.cookie_jar.update_cookies(jar, response_url=URL(self._base))
+        self._rvt = state["rvt"]; self._pair_tokens = bool(state.get("pair"))
+        return True
+    async def async_resume_session(self, state: Dict[str, Any]) -> bool:
+        # Sessão guardada: valida com uma chamada barata, senão obriga a login completo
+        if not self.restore_session(state): return False
+        try:
+            await self._get_json_once("ReadingsAndConsumptions/GetLastReadingInfo", "ReadingsAndConsumptions", pair_tokens=self._pair_tokens)
+        except SMSNetAuthError as e:
+            self._logger.debug("SMSNET restored session rejected: %s", e)
+            self._rvt = None
+            return False
+        except SMSNetError as e:
+            # Portal em baixo não invalida a sessão; a primeira atualização decide
+            self._logger.debug("SMSNET could not validate restored session: %s", e)
+            return True
+        self._auth_gen += 1
+        self.metrics.incr("session_restores")
+        return True
+    @property
+    def account_id(self) -> str:
+        return f"{self._tenant}:{self._username}"
+    @property
+    def auth_generation(self) -> int:
+        return self._auth_gen
     def _extract_cookie_token(self) -> Optional[str]:
         jar = self._session.cookie_jar
         for cookie in jar:
@@ -89,9 +317,12 @@ class SMSNetClient:
         return None
     async def _refresh_page_token(self) -> str:
         url = self._url("ReadingsAndConsumptions")
-        resp, text = await self._fetch("GET", url, headers={"User-Agent": "HomeAssistant"})
-        m = re.search(r'name="__RequestVerificationToken"[^>]*value="([^"]+)"', text, re.I)
-        if m: self._rvt = m.group(1)
+        scanner = TokenScanner()
+        resp = await self._scan("GET", url, scanner, headers={"User-Agent": "HomeAssistant"}, allow_redirects=False)
+        if resp.status in (301, 302, 303):
+            if "Account/Login" in resp.headers.get("Location", ""): raise SMSNetAuthError("Session expired: page redirected to login")
+            raise SMSNetError(f"GET {url} unexpected redirect: {resp.status}")
+        if scanner.token: self._rvt = scanner.token
         return self._rvt or ""
     def _ajax_headers(self, referer_path: str, pair_tokens: bool = False) -> Dict[str, str]:
         ref = self._url(referer_path); rvt = self._rvt or ""
@@ -109,27 +340,48 @@ class SMSNetClient:
     async def _get_json_once(self, path: str, referer_path: str, pair_tokens: bool) -> Any:
         url = self._url(path); headers = self._ajax_headers(referer_path, pair_tokens=pair_tokens)
         self._logger.debug("SMSNET GET %s (pair=%s)", url, pair_tokens)
-        async with self._session.get(url, headers=headers) as resp:
-            text = await resp.text()
-            self._logger.debug("SMSNET GET %s status=%s head=%s", path, resp.status, text[:200])
-            if resp.status != 200: raise Exception(f"GET {path} failed: {resp.status}; head={text[:200]}")
-            try: return await resp.json(content_type=None)
-            except Exception: return json.loads(text)
+        async with self._request("GET", url, headers=headers, allow_redirects=False) as resp:
+            # Sessão expirada: o portal redireciona para o login; não vale a pena seguir e descarregar a página
+            if resp.status in (301, 302, 303) and "Account/Login" in resp.headers.get("Location", ""):
+                raise SMSNetAuthError(f"GET {path} redirected to login")
+            text = await self._read_text(resp, url)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug("SMSNET GET %s status=%s head=%s", path, resp.status, text[:200])
+            if resp.status != 200: raise SMSNetError(f"GET {path} failed: {resp.status}; head={text[:200]}")
+            if "Account/Login" in resp.url.path: raise SMSNetAuthError(f"GET {path} redirected to login")
+            try: return json.loads(text)
+            except ValueError as e:
+                # Sessão expirada costuma devolver a página HTML de login em vez de JSON
+                if text.lstrip().startswith("<"): raise SMSNetAuthError(f"GET {path} returned HTML instead of JSON") from e
+                raise SMSNetParseError(f"GET {path} returned invalid JSON: {e}") from e
     async def _get_json(self, path: str, referer_path: str) -> Any:
-        try: return await self._get_json_once(path, referer_path, pair_tokens=False)
-        except Exception as e1:
+        gen = self._auth_gen
+        try: return await self._get_json_once(path, referer_path, pair_tokens=self._pair_tokens)
+        except SMSNetAuthError as e1:
             self._logger.debug("SMSNET first GET failed: %s", e1)
-            await self._refresh_page_token()
-            try: return await self._get_json_once(path, referer_path, pair_tokens=True)
-            except Exception:
-                await self.login()
-                return await self._get_json_once(path, referer_path, pair_tokens=True)
+            await self._reauth(gen, full=False); gen = self._auth_gen
+            fresh = self._login_gen == gen
+            if not fresh: self.metrics.incr("paired_retries")
+            try: result = await self._get_json_once(path, referer_path, pair_tokens=self._pair_tokens if fresh else True)
+            except SMSNetAuthError:
+                if fresh: raise
+                await self._reauth(gen, full=True)
+                return await self._get_json_once(path, referer_path, pair_tokens=self._pair_tokens)
+            # Sessão sem sonda de modo (p.ex. adotada do config flow): o pedido emparelhado passou, fica aprendido
+            if not fresh and not self._pair_tokens:
+                self._logger.debug("SMSNET portal wants paired tokens"); self._pair_tokens = True
+            return result
     async def _try_paths(self, paths: List[str], referer_path: str) -> Any:
         last_exc: Optional[Exception] = None
-        for p in paths:
-            try: return await self._get_json(p, referer_path)
-            except Exception as e: last_exc = e; self._logger.debug("SMSNET path failed %s -> %s", p, e)
-        raise last_exc or Exception("All paths failed")
+        for i, p in enumerate(self.routes.order(paths)):
+            if i: self.metrics.incr("path_fallbacks")
+            try: result = await self._get_json(p, referer_path)
+            except SMSNetLoginError: raise
+            except (SMSNetNotFoundError, SMSNetAuthError, SMSNetParseError) as e:
+                last_exc = e; self.routes.mark_bad(paths, p); self._logger.debug("SMSNET path failed %s -> %s", p, e); continue
+            self.routes.mark_good(paths, p)
+            return result
+        raise last_exc or SMSNetError("All paths failed")
     async def get_last_reading(self) -> Any:
         return await self._try_paths(["ReadingsAndConsumptions/GetLastReadingInfo", "Readings/GetLastReadingInfo"], "ReadingsAndConsumptions")
     async def get_consumptions_graph(self) -> Any:
@@ -138,3 +390,31 @@ class SMSNetClient:
         return await self._get_json("Billing/GetBilledValuesGraph", "Home/Index")
     async def get_billing_info(self) -> Any:
         return await self._get_json("Billing/GetBillingInfo", "Home/Index")
+    async def _retry_transient(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        # 5xx/erros de ligação isolados não devem custar a atualização inteira; com o disjuntor aberto não vale a pena
+        for attempt in range(TRANSIENT_RETRIES + 1):
+            try: return await call()
+            except SMSNetCircuitOpenError: raise
+            except SMSNetServerError as e:
+                if attempt == TRANSIENT_RETRIES: raise
+                self.metrics.incr("server_retries")
+                self._logger.debug("SMSNET %s failed (%s), retrying", key, e)
+                await asyncio.sleep(TRANSIENT_RETRY_DELAY * 2 ** attempt)
+    async def fetch_endpoints(self, keys: List[str], max_parallel: int = 4) -> Tuple[Dict[str, Any], List[str]]:
+        results: Dict[str, Any] = {}; errors: List[str] = []; login_errors: List[SMSNetLoginError] = []
+        try:
+            if not self._rvt: await self._retry_transient("login", self.login)
+        except SMSNetLoginError:
+            raise
+        except Exception as e:
+            errors.append(f"login: {e}")
+        sem = asyncio.Semaphore(max_parallel)
+        async def get_safe(key: str) -> None:
+            async with sem:
+                try: results[key] = await self._retry_transient(key, getattr(self, ENDPOINTS[key]))
+                except SMSNetLoginError as e: login_errors.append(e); errors.append(f"{key}: {e}")
+                except Exception as e: errors.append(f"{key}: {e}")
+        await asyncio.gather(*(get_safe(k) for k in keys))
+        # Credenciais recusadas e nada obtido: quem chama decide (p.ex. pedir nova autenticação)
+        if login_errors and not results: raise login_errors[0]
+        return results, errors
@@ -1,21 +1,39 @@
 from __future__ import annotations
+import time
+from typing import Any
 import voluptuous as vol
+from aiohttp import CookieJar
 from homeassistant import config_entries
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from .const import DOMAIN, CONF_TENANT, CONF_USERNAME, CONF_PASSWORD
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from .const import DOMAIN, DEFAULT_BASE_URL, CONF_TENANT, CONF_USERNAME, CONF_PASSWORD, DATA_THROTTLE, DATA_BREAKER, DATA_PENDING_SESSIONS, REFRESH_DEADLINE
 from .api import SMSNetClient
+from .throttle import CircuitBreaker, HostThrottle
 class SMSNetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
+    async def _async_login(self, tenant: str, username: str, password: str) -> None:
+        # Sessão descartável: não toca nos cookies das contas já configuradas
+        session = async_create_clientsession(self.hass, auto_cleanup=False, cookie_jar=CookieJar())
+        # Logins do flow passam pelo mesmo throttle e disjuntor das entradas (p.ex. ao configurar muitas contas)
+        domain_data = self.hass.data.setdefault(DOMAIN, {})
+        throttle = domain_data.setdefault(DATA_THROTTLE, HostThrottle())
+        breaker = domain_data.setdefault(DATA_BREAKER, CircuitBreaker())
+        try:
+            client = SMSNetClient(session, DEFAULT_BASE_URL, tenant, username, password, None, throttle=throttle, breaker=breaker)
+            with client.deadline(REFRESH_DEADLINE.total_seconds()): await client.login_basic()
+        finally:
+            await session.close()
+        # A entrada criada a seguir reaproveita esta sessão em vez de voltar a fazer login
+        pending = domain_data.setdefault(DATA_PENDING_SESSIONS, {})
+        pending[f"{tenant}:{username}"] = (time.monotonic(), client.export_session())
     async def async_step_user(self, user_input=None) -> FlowResult:
         errors = {}
         if user_input is not None:
             tenant = user_input[CONF_TENANT].strip("/"); username = user_input[CONF_USERNAME]; password = user_input[CONF_PASSWORD]
-            session = async_get_clientsession(self.hass); client = SMSNetClient(session, "https://www.aquamatrix.pt", tenant, username, password, None)
-            try: await client.login_basic()
+            await self.async_set_unique_id(f"{tenant}:{username}"); self._abort_if_unique_id_configured()
+            try: await self._async_login(tenant, username, password)
             except Exception: errors["base"] = "auth"
             else:
-                await self.async_set_unique_id(f"{tenant}:{username}"); self._abort_if_unique_id_configured()
                 return self.async_create_entry(title=f"SMSnet ({tenant})", data=user_input)
         schema = vol.Schema({vol.Required(CONF_TENANT, default="SMSnet"): str, vol.Required(CONF_USERNAME): str, vol.Required(CONF_PASSWORD): str})
         return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
@@ -25,4 +43,19 @@ class SMSNetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         password = import_data.get(CONF_PASSWORD, "")
         await self.async_set_unique_id(f"{tenant}:{username}")
         self._abort_if_unique_id_configured()
+        # Sem login válido a entrada é criada na mesma; a primeira atualização volta a tentar
+        try: await self._async_login(tenant, username, password)
+        except Exception: pass
         return self.async_create_entry(title=f"SMSnet ({tenant})", data={CONF_TENANT: tenant, CONF_USERNAME: username, CONF_PASSWORD: password})
+    async def async_step_reauth(self, entry_data: dict[str, Any]) -> FlowResult:
+        return await self.async_step_reauth_confirm()
+    async def async_step_reauth_confirm(self, user_input=None) -> FlowResult:
+        errors = {}
+        entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        if user_input is not None:
+            try: await self._async_login(entry.data[CONF_TENANT], entry.data[CONF_USERNAME], user_input[CONF_PASSWORD])
+            except Exception: errors["base"] = "auth"
+            else:
+                return self.async_update_reload_and_abort(entry, data={**entry.data, CONF_PASSWORD: user_input[CONF_PASSWORD]})
+        schema = vol.Schema({vol.Required(CONF_PASSWORD): str})
+        return self.async_show_form(step_id="reauth_confirm", data_schema=schema, errors=errors, description_placeholders={"username": entry.data[CONF_USERNAME]})
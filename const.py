@@ -1,7 +1,27 @@
 from __future__ import annotations
+from datetime import timedelta
 DOMAIN = "smsnet_aquamatrix"
 DEFAULT_BASE_URL = "https://www.aquamatrix.pt"
 CONF_TENANT = "tenant"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 PLATFORMS = ["sensor"]
+MAX_PARALLEL_FETCHES = 4
+DATA_THROTTLE = "host_throttle"
+DATA_BREAKER = "host_breaker"
+DATA_PENDING_SESSIONS = "pending_sessions"
+PENDING_SESSION_TTL = timedelta(minutes=10)
+STORAGE_VERSION = 1
+STORAGE_KEY_SESSION = f"{DOMAIN}.session"
+STORAGE_KEY_STATISTICS = f"{DOMAIN}.statistics"
+STORAGE_KEY_SCHEDULE = f"{DOMAIN}.schedule"
+# Cadência por endpoint: leituras mudam no máximo diariamente (a janela de chegada aprendida pelo
+# scheduler antecipa a leitura nova), faturação mensalmente
+ENDPOINT_INTERVALS = {
+    "last_reading": timedelta(hours=12),
+    "consumptions": timedelta(hours=24),
+    "billed": timedelta(days=7),
+    "billing_info": timedelta(days=3),
+}
+MIN_UPDATE_INTERVAL = timedelta(minutes=5)
+REFRESH_DEADLINE = timedelta(seconds=120)
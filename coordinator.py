@@ -1,29 +1,112 @@
 from __future__ import annotations
 import logging
+import time
 from datetime import timedelta
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from .api import SMSNetClient
-UPDATE_INTERVAL = timedelta(hours=6)
-class SMSNetCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass: HomeAssistant, client: SMSNetClient, logger: logging.Logger | None = None) -> None:
-        super().__init__(hass, logger=logger or logging.getLogger(__name__), name="SMSnet Coordinator", update_interval=UPDATE_INTERVAL)
+from homeassistant.util import dt as dt_util
+from .api import ENDPOINTS, SMSNetClient, SMSNetLoginError
+from .const import MAX_PARALLEL_FETCHES, ENDPOINT_INTERVALS, MIN_UPDATE_INTERVAL, REFRESH_DEADLINE
+from .scheduler import RefreshScheduler
+from .snapshot import SMSNetSnapshot, build_snapshot, fingerprint
+UPDATE_INTERVAL = min(ENDPOINT_INTERVALS.values())
+class SMSNetCoordinator(DataUpdateCoordinator[SMSNetSnapshot]):
+    def __init__(self, hass: HomeAssistant, client: SMSNetClient, logger: logging.Logger | None = None, store: Store | None = None, importer=None, schedule_store: Store | None = None) -> None:
+        super().__init__(hass, logger=logger or logging.getLogger(__name__), name="SMSnet Coordinator", update_interval=UPDATE_INTERVAL, always_update=False)
         self.client = client
-    async def _async_update_data(self):
-        results = {}; errors = []
-        try:
-            if not getattr(self.client, "_rvt", None):
-                await self.client.login()
+        self._store = store
+        self._importer = importer
+        self._schedule_store = schedule_store
+        self._saved_gen: int | None = None
+        self._resume_pending = False
+        self._fingerprints: dict[str, str] = {}
+        self.payloads: dict[str, object] = {}
+        self.scheduler = RefreshScheduler({k: ENDPOINT_INTERVALS[k] for k in ENDPOINTS}, seed=client.account_id)
+    async def async_restore_session(self) -> bool:
+        if self._store is None: return False
+        try: state = await self._store.async_load()
+        except Exception as e:
+            self.logger.debug("SMSNET could not load stored session: %s", e); return False
+        ok = await self.client.async_resume_session(state or {})
+        if ok: self._saved_gen = self.client.auth_generation
+        self.logger.debug("SMSNET stored session %s", "reused" if ok else "unavailable, full login needed")
+        return ok
+    async def async_restore_schedule(self) -> None:
+        # Horas de chegada aprendidas sobrevivem a reinícios; sem elas a janela levava dias a reaparecer
+        if self._schedule_store is None: return
+        try: state = await self._schedule_store.async_load()
         except Exception as e:
-            errors.append(f"login: {e}")
-        async def get_safe(key, coro):
-            try: results[key] = await coro
-            except Exception as e: errors.append(f"{key}: {e}")
-        await get_safe("last_reading", self.client.get_last_reading())
-        await get_safe("consumptions", self.client.get_consumptions_graph())
-        await get_safe("billed", self.client.get_billed_graph())
-        await get_safe("billing_info", self.client.get_billing_info())
-        if results:
-            self.logger.debug("SMSNET update ok keys=%s errors=%s", list(results.keys()), errors)
-            return results
-        raise UpdateFailed("; ".join(errors) if errors else "No data")
+            self.logger.debug("SMSNET could not load stored schedule: %s", e); return
+        self.scheduler.restore_arrivals((state or {}).get("arrivals"))
+    def schedule_first_refresh(self) -> None:
+        # Depois de um arranque as entradas não atualizam todas ao mesmo tempo; a sessão guardada
+        # só é validada nessa primeira atualização, para que também esse pedido fique desfasado
+        self._resume_pending = True
+        self.update_interval = timedelta(seconds=self.scheduler.first_delay())
+    async def _async_save_session(self) -> None:
+        if self._store is None or self._saved_gen == self.client.auth_generation: return
+        await self._store.async_save(self.client.export_session())
+        self._saved_gen = self.client.auth_generation
+    async def _async_update_data(self) -> SMSNetSnapshot:
+        if self._resume_pending:
+            self._resume_pending = False; await self.async_restore_session()
+        stale = self.scheduler.stale(wall=dt_util.now())
+        if not stale:
+            # Acordou antes do próximo prazo: nada a pedir ao portal, nem sequer o login
+            self._schedule_next()
+            if self.data is None:
+                raise UpdateFailed(f"No data yet, next attempt in {round(self.update_interval.total_seconds())} s")
+            return self.data
+        started = time.monotonic()
+        try:
+            with self.client.deadline(REFRESH_DEADLINE.total_seconds()):
+                results, errors = await self.client.fetch_endpoints(stale, MAX_PARALLEL_FETCHES)
+        except SMSNetLoginError as e:
+            self.scheduler.mark_failed(stale); self._schedule_next()
+            raise ConfigEntryAuthFailed(str(e)) from e
+        self.client.metrics.last_refresh_s = time.monotonic() - started
+        self.scheduler.mark_fetched(results)
+        self.scheduler.mark_failed(k for k in stale if k not in results)
+        self._schedule_next()
+        if not results:
+            raise UpdateFailed("; ".join(errors) if errors else "No data")
+        await self._async_save_session()
+        self.logger.debug("SMSNET update ok keys=%s errors=%s", list(results.keys()), errors)
+        changed = []
+        for k, v in results.items():
+            fp = fingerprint(v)
+            if self._fingerprints.get(k) != fp:
+                self._fingerprints[k] = fp; self.payloads[k] = v; changed.append(k)
+        if changed and self._importer is not None:
+            try: await self._importer.async_import(self.payloads, changed)
+            except Exception as e: self.logger.warning("SMSNET statistics import failed: %s", e)
+        if self.data is not None and not changed:
+            # Nada mudou no portal: devolver o mesmo snapshot evita notificar as entidades
+            self.logger.debug("SMSNET payloads unchanged, skipping state writes")
+            return self.data
+        snapshot = build_snapshot(self.payloads)
+        snapshot.diff(self.data)
+        if self._learn_arrivals(snapshot) and self._schedule_store is not None:
+            await self._schedule_store.async_save({"arrivals": self.scheduler.export_arrivals()})
+        self._schedule_next()
+        if snapshot.errors and (self.data is None or snapshot.errors != self.data.errors):
+            self.logger.warning("SMSNET could not parse some values: %s", snapshot.errors)
+        return snapshot
+    def _learn_arrivals(self, snapshot: SMSNetSnapshot) -> bool:
+        now = dt_util.now(); learned = False
+        if self.data is not None:
+            if "last_reading_date" in snapshot.changed:
+                self.scheduler.observe_arrival("last_reading", now); learned = True
+            if snapshot.changed & {"consumption_current_month", "consumption_current_month_label"}:
+                self.scheduler.observe_arrival("consumptions", now); learned = True
+        # Leitura de hoje já chegou: não vale a pena apertar o polling até amanhã
+        if snapshot.last_reading_date == now.date():
+            self.scheduler.quiet_until("last_reading", dt_util.start_of_local_day() + timedelta(days=1))
+        else:
+            self.scheduler.quiet_until("last_reading", None)
+        return learned
+    def _schedule_next(self) -> None:
+        delay = self.scheduler.jitter(self.scheduler.next_due(wall=dt_util.now()))
+        self.update_interval = max(MIN_UPDATE_INTERVAL, timedelta(seconds=delay))
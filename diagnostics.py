@@ -0,0 +1,22 @@
+from __future__ import annotations
+from typing import Any
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD, DATA_THROTTLE, DATA_BREAKER
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    data = hass.data[DOMAIN][entry.entry_id]
+    client = data["client"]
+    coordinator = data["coordinator"]
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "routes": client.routes.as_dict(),
+        "metrics": client.metrics.as_dict(),
+        "endpoints": coordinator.scheduler.as_dict(),
+        "host_throttle": hass.data[DOMAIN][DATA_THROTTLE].as_dict() if DATA_THROTTLE in hass.data[DOMAIN] else None,
+        "host_breaker": hass.data[DOMAIN][DATA_BREAKER].as_dict() if DATA_BREAKER in hass.data[DOMAIN] else None,
+    }
@@ -0,0 +1,130 @@
+from __future__ import annotations
+import asyncio
+import csv
+import ipaddress
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Set, TextIO
+from aiohttp import ClientSession, CookieJar
+from yarl import URL
+from .api import ENDPOINTS, SMSNetClient
+from .const import DEFAULT_BASE_URL, REFRESH_DEADLINE
+from .snapshot import build_snapshot, monthly_series
+from .throttle import CircuitBreaker, HostThrottle
+
+_LOGGER = logging.getLogger(__name__)
+DEFAULT_WORKERS = 8
+CSV_FIELDS = ("tenant", "username", "series", "month", "value")
+
+def read_accounts(path: str) -> Iterator[Dict[str, str]]:
+    # CSV (tenant,username,password) ou JSON/NDJSON com as mesmas chaves
+    with open(path, encoding="utf-8") as fh:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(fh):
+                yield {"tenant": (row.get("tenant") or "SMSnet").strip("/"), "username": row["username"], "password": row["password"]}
+            return
+        text = fh.read()
+    rows = json.loads(text) if text.lstrip().startswith("[") else [json.loads(l) for l in text.splitlines() if l.strip()]
+    for row in rows:
+        yield {"tenant": (row.get("tenant") or "SMSnet").strip("/"), "username": row["username"], "password": row["password"]}
+
+def account_key(account: Dict[str, str]) -> str:
+    return f"{account['tenant']}:{account['username']}"
+
+class Checkpoint:
+    def __init__(self, path: Optional[str]) -> None:
+        self._path = path
+        self.done: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as fh: self.done = {l.strip() for l in fh if l.strip()}
+        self._fh: Optional[TextIO] = open(path, "a", encoding="utf-8") if path else None
+    def mark(self, key: str) -> None:
+        self.done.add(key)
+        if self._fh is not None: self._fh.write(key + "\n"); self._fh.flush()
+    def close(self) -> None:
+        if self._fh is not None: self._fh.close()
+
+class ResultWriter:
+    def __init__(self, out: TextIO, fmt: str, write_header: bool = True) -> None:
+        self._out = out
+        self._fmt = fmt
+        self._csv = csv.DictWriter(out, fieldnames=CSV_FIELDS) if fmt == "csv" else None
+        if self._csv is not None and write_header: self._csv.writeheader()
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._csv is None:
+            self._out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        else:
+            for series in ("consumption", "billed"):
+                for month, value in record.get(series) or []:
+                    self._csv.writerow({"tenant": record["tenant"], "username": record["username"], "series": series, "month": month, "value": value})
+        self._out.flush()
+
+def _cookie_jar(base_url: str) -> CookieJar:
+    # O CookieJar do aiohttp ignora cookies de hosts IP (portal de testes, instalações locais) sem unsafe=True
+    try: ipaddress.ip_address(URL(base_url).host or "")
+    except ValueError: return CookieJar()
+    return CookieJar(unsafe=True)
+
+async def export_account(account: Dict[str, str], base_url: str, throttle: Optional[HostThrottle], breaker: Optional[CircuitBreaker]) -> Dict[str, Any]:
+    # Um cookie jar por conta: sessões de contas diferentes nunca se misturam
+    async with ClientSession(cookie_jar=_cookie_jar(base_url)) as session:
+        client = SMSNetClient(session, base_url, account["tenant"], account["username"], account["password"], _LOGGER, throttle=throttle, breaker=breaker)
+        with client.deadline(REFRESH_DEADLINE.total_seconds()):
+            results, errors = await client.fetch_endpoints(list(ENDPOINTS))
+    snap = build_snapshot(results)
+    return {
+        "tenant": account["tenant"],
+        "username": account["username"],
+        "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "ok": len(results) == len(ENDPOINTS),
+        "last_reading_value": snap.last_reading_value,
+        "last_reading_date": snap.last_reading_date,
+        "debt_total": snap.debt_total,
+        "next_due_date": snap.next_due_date,
+        "consumption": [(f"{y:04d}-{m:02d}", v) for (y, m), v in monthly_series(results.get("consumptions"), ("FirstValue", "Value"))],
+        "billed": [(f"{y:04d}-{m:02d}", v) for (y, m), v in monthly_series(results.get("billed"), ("Value",))],
+        "errors": errors + [f"parse {k}: {v}" for k, v in snap.errors.items()],
+    }
+
+async def export(accounts_path: str, out_path: str, fmt: str = "ndjson", workers: int = DEFAULT_WORKERS,
+                 checkpoint_path: Optional[str] = None, base_url: str = DEFAULT_BASE_URL,
+                 max_concurrency: Optional[int] = None, rate: Optional[float] = None) -> Dict[str, int]:
+    checkpoint = Checkpoint(checkpoint_path)
+    resuming = bool(checkpoint.done) and os.path.exists(out_path)
+    throttle = HostThrottle(max_concurrency or workers, rate if rate is not None else 2.0)
+    breaker = CircuitBreaker()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    stats = {"exported": 0, "failed": 0, "skipped": 0}
+    with open(out_path, "a" if resuming else "w", encoding="utf-8", newline="") as out:
+        writer = ResultWriter(out, fmt, write_header=not resuming)
+        async def worker() -> None:
+            while True:
+                account = await queue.get()
+                try:
+                    if account is None: return
+                    try: record = await export_account(account, base_url, throttle, breaker)
+                    except Exception as e:
+                        record = {"tenant": account["tenant"], "username": account["username"], "ok": False, "errors": [str(e)]}
+                    # Só contas completas vão para o ficheiro: as falhadas não ficam no checkpoint e são
+                    # repetidas ao retomar, por isso escrevê-las duplicaria linhas
+                    if record["ok"]:
+                        writer.write(record); checkpoint.mark(account_key(account)); stats["exported"] += 1
+                    else:
+                        _LOGGER.warning("SMSNET export failed for %s: %s", account_key(account), "; ".join(record["errors"]))
+                        stats["failed"] += 1
+                finally:
+                    queue.task_done()
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            for account in read_accounts(accounts_path):
+                if account_key(account) in checkpoint.done: stats["skipped"] += 1; continue
+                await queue.put(account)
+            for _ in tasks: await queue.put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks: t.cancel()
+            checkpoint.close()
+    _LOGGER.info("SMSNET export finished: %s (host throttle %s)", stats, throttle.as_dict())
+    return stats
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Tuple
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import DOMAIN, STORAGE_VERSION, STORAGE_KEY_STATISTICS
+from .snapshot import monthly_series
+
+_LOGGER = logging.getLogger(__name__)
+IMPORT_BATCH_SIZE = 100
+# payload -> (sufixo do statistic_id, nome, unidade, chaves de valor)
+SERIES = {
+    "consumptions": ("consumption", "Água - Consumo mensal", UnitOfVolume.CUBIC_METERS, ("FirstValue", "Value")),
+    "billed": ("billed", "Água - Valor faturado", "EUR", ("Value",)),
+}
+
+class StatisticsImporter:
+    def __init__(self, hass: HomeAssistant, entry_id: str, title: str) -> None:
+        self.hass = hass
+        self._entry_id = entry_id
+        self._title = title
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_STATISTICS}.{entry_id}")
+        self._watermarks: Dict[str, Dict[str, Any]] | None = None
+    def statistic_id(self, suffix: str) -> str:
+        return f"{DOMAIN}:{self._entry_id.lower()}_{suffix}"
+    async def async_import(self, payloads: Dict[str, Any], keys: List[str] | None = None) -> None:
+        if "recorder" not in self.hass.config.components: return
+        if self._watermarks is None: self._watermarks = await self._store.async_load() or {}
+        dirty = False
+        for key in keys if keys is not None else list(SERIES):
+            if key in SERIES and key in payloads: dirty |= self._import_series(key, payloads[key])
+        if dirty: await self._store.async_save(self._watermarks)
+    def _import_series(self, key: str, payload: Any) -> bool:
+        suffix, name, unit, value_keys = SERIES[key]
+        series = monthly_series(payload, value_keys)
+        if not series: return False
+        mark = self._watermarks.get(key) or {}
+        last = tuple(mark["month"]) if mark.get("month") else None
+        total = float(mark.get("sum", 0.0))
+        new = [(m, v) for m, v in series if last is None or m > last]
+        if not new: return False
+        # O último mês ainda pode mudar: é escrito mas não avança a marca
+        rows: List[StatisticData] = []; running = total
+        for i, (month, value) in enumerate(new):
+            running += value
+            rows.append(StatisticData(start=self._month_start(month), state=value, sum=running))
+            if i < len(new) - 1: mark = {"month": list(month), "sum": running}
+        meta = StatisticMetaData(has_mean=False, has_sum=True, name=f"{name} ({self._title})", source=DOMAIN, statistic_id=self.statistic_id(suffix), unit_of_measurement=unit)
+        for i in range(0, len(rows), IMPORT_BATCH_SIZE):
+            async_add_external_statistics(self.hass, meta, rows[i:i + IMPORT_BATCH_SIZE])
+        _LOGGER.debug("SMSNET imported %s %s statistics (watermark=%s)", len(rows), suffix, mark.get("month"))
+        changed = mark != self._watermarks.get(key)
+        self._watermarks[key] = mark
+        return changed
+    @staticmethod
+    def _month_start(month: Tuple[int, int]) -> datetime:
+        return dt_util.start_of_local_day(date(month[0], month[1], 1))
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+        # Estatísticas externas não pertencem a nenhuma entidade: sem isto ficavam órfãs no recorder
+        if "recorder" in self.hass.config.components:
+            get_instance(self.hass).async_clear_statistics([self.statistic_id(suffix) for suffix, *_ in SERIES.values()])
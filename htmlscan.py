@@ -0,0 +1,40 @@
+from __future__ import annotations
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+TOKEN_NAME = "__RequestVerificationToken"
+
+class _Scanner(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.done = False
+
+class LoginFormScanner(_Scanner):
+    def __init__(self) -> None:
+        super().__init__()
+        self.found = False
+        self.action = ""
+        self.inputs: List[Dict[str, str]] = []
+        self._in_form = False
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if self.done: return
+        if tag == "form" and not self._in_form:
+            a = dict(attrs)
+            if (a.get("method") or "").lower() == "post":
+                self._in_form = True; self.found = True; self.action = a.get("action") or ""
+        elif tag == "input" and self._in_form:
+            self.inputs.append({k: v or "" for k, v in attrs})
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "form" and self._in_form:
+            self._in_form = False; self.done = True
+
+class TokenScanner(_Scanner):
+    def __init__(self, name: str = TOKEN_NAME) -> None:
+        super().__init__()
+        self._name = name
+        self.token: Optional[str] = None
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if self.done or tag != "input": return
+        a = dict(attrs)
+        if a.get("name") == self._name and a.get("value"):
+            self.token = a["value"]; self.done = True
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from collections import Counter
+from typing import Any, Dict, Optional
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNTERS = ("logins", "token_refreshes", "paired_retries", "relogins", "path_fallbacks", "session_restores", "server_retries")
+
+class EndpointStats:
+    __slots__ = ("requests", "errors", "latency_total", "latency_max", "buckets", "bytes_total", "bytes_max")
+    def __init__(self) -> None:
+        self.requests = 0; self.errors = 0
+        self.latency_total = 0.0; self.latency_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.bytes_total = 0; self.bytes_max = 0
+    def as_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{b:g}s" for b in LATENCY_BUCKETS] + ["inf"]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_avg_ms": round(self.latency_total / self.requests * 1000, 1) if self.requests else None,
+            "latency_max_ms": round(self.latency_max * 1000, 1),
+            "latency_histogram": dict(zip(labels, self.buckets)),
+            "bytes_total": self.bytes_total,
+            "bytes_max": self.bytes_max,
+        }
+
+class ClientMetrics:
+    def __init__(self) -> None:
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.counters: Counter = Counter({name: 0 for name in COUNTERS})
+        self.last_refresh_s: Optional[float] = None
+    def _stats(self, endpoint: str) -> EndpointStats:
+        stats = self.endpoints.get(endpoint)
+        if stats is None: stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+    def observe(self, endpoint: str, latency: float, ok: bool) -> None:
+        stats = self._stats(endpoint)
+        stats.requests += 1
+        if not ok: stats.errors += 1
+        stats.latency_total += latency; stats.latency_max = max(stats.latency_max, latency)
+        i = next((i for i, b in enumerate(LATENCY_BUCKETS) if latency <= b), len(LATENCY_BUCKETS))
+        stats.buckets[i] += 1
+    def observe_size(self, endpoint: str, size: int) -> None:
+        stats = self._stats(endpoint)
+        stats.bytes_total += size; stats.bytes_max = max(stats.bytes_max, size)
+    def incr(self, name: str) -> None:
+        self.counters[name] += 1
+    @property
+    def requests(self) -> int:
+        return sum(s.requests for s in self.endpoints.values())
+    @property
+    def errors(self) -> int:
+        return sum(s.errors for s in self.endpoints.values())
+    @property
+    def bytes_total(self) -> int:
+        return sum(s.bytes_total for s in self.endpoints.values())
+    @property
+    def latency_avg_ms(self) -> Optional[float]:
+        n = self.requests
+        return round(sum(s.latency_total for s in self.endpoints.values()) / n * 1000, 1) if n else None
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_total": self.bytes_total,
+            "last_refresh_s": None if self.last_refresh_s is None else round(self.last_refresh_s, 3),
+            "counters": dict(self.counters),
+            "endpoints": {k: v.as_dict() for k, v in sorted(self.endpoints.items())},
+        }
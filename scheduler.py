@@ -0,0 +1,124 @@
+from __future__ import annotations
+import math
+import random
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional
+
+ARRIVAL_SAMPLES = 14
+ARRIVAL_WINDOW_H = 1.5
+FAST_INTERVAL = timedelta(hours=1)
+BACKOFF_BASE = timedelta(minutes=10)
+BACKOFF_MAX = timedelta(hours=12)
+JITTER_FRACTION = 0.1
+FIRST_POLL_SPREAD = timedelta(minutes=2)
+
+class RefreshScheduler:
+    def __init__(self, intervals: Dict[str, timedelta], seed: str = "") -> None:
+        self._intervals = {k: v.total_seconds() for k, v in intervals.items()}
+        self._fetched: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._arrivals: Dict[str, Deque[float]] = {}
+        self._quiet_until: Dict[str, datetime] = {}
+        # Desfasamento fixo por entrada para que as contas não disparem todas ao mesmo tempo
+        self._offset = (zlib.crc32(seed.encode()) % 1000) / 1000.0
+        self._rng = random.Random(seed)
+    @property
+    def keys(self) -> List[str]:
+        return list(self._intervals)
+    def interval(self, key: str, wall: Optional[datetime] = None) -> float:
+        base = self._intervals[key]
+        wall = wall or datetime.now().astimezone()
+        quiet = self._quiet_until.get(key)
+        if quiet is not None and wall < quiet: return base
+        window = self.arrival_window(key)
+        if window is None: return base
+        hour = wall.hour + wall.minute / 60.0
+        dist = abs((hour - window + 12) % 24 - 12)
+        return min(base, FAST_INTERVAL.total_seconds()) if dist <= ARRIVAL_WINDOW_H else base
+    def stale(self, now: Optional[float] = None, wall: Optional[datetime] = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+        out = []
+        for k in self._intervals:
+            if now < self._retry_at.get(k, 0.0): continue
+            if k not in self._fetched or k in self._failures or now - self._fetched[k] >= self.interval(k, wall): out.append(k)
+        return out
+    def mark_fetched(self, keys: Iterable[str], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for k in keys:
+            self._fetched[k] = now; self._failures.pop(k, None); self._retry_at.pop(k, None)
+    def mark_failed(self, keys: Iterable[str], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for k in keys:
+            n = self._failures.get(k, 0) + 1; self._failures[k] = n
+            delay = min(BACKOFF_BASE.total_seconds() * 2 ** (n - 1), BACKOFF_MAX.total_seconds())
+            self._retry_at[k] = now + delay
+    def observe_arrival(self, key: str, wall: Optional[datetime] = None) -> None:
+        wall = wall or datetime.now().astimezone()
+        self._arrivals.setdefault(key, deque(maxlen=ARRIVAL_SAMPLES)).append(wall.hour + wall.minute / 60.0)
+    def quiet_until(self, key: str, until: Optional[datetime]) -> None:
+        if until is None: self._quiet_until.pop(key, None)
+        else: self._quiet_until[key] = until
+    def arrival_window(self, key: str) -> Optional[float]:
+        samples = self._arrivals.get(key)
+        if not samples or len(samples) < 2: return None
+        # Média circular das horas de chegada (23h e 1h devem dar meia-noite)
+        x = sum(math.cos(h / 24 * 2 * math.pi) for h in samples)
+        y = sum(math.sin(h / 24 * 2 * math.pi) for h in samples)
+        if abs(x) < 1e-9 and abs(y) < 1e-9: return None
+        return (math.atan2(y, x) / (2 * math.pi) * 24) % 24
+    def until_window(self, key: str, wall: Optional[datetime] = None) -> Optional[float]:
+        # Segundos até abrir a próxima janela de chegada (None se não há janela ou já estamos dentro dela)
+        window = self.arrival_window(key)
+        if window is None: return None
+        wall = wall or datetime.now().astimezone()
+        quiet = self._quiet_until.get(key)
+        start = wall if quiet is None or wall >= quiet else quiet
+        hour = start.hour + start.minute / 60.0 + start.second / 3600.0
+        if abs((hour - window + 12) % 24 - 12) <= ARRIVAL_WINDOW_H:
+            return None if start is wall else (start - wall).total_seconds()
+        ahead = (window - ARRIVAL_WINDOW_H - hour) % 24
+        return (start - wall).total_seconds() + ahead * 3600
+    def export_arrivals(self) -> Dict[str, List[float]]:
+        return {k: list(v) for k, v in self._arrivals.items()}
+    def restore_arrivals(self, state: Optional[Dict[str, List[float]]]) -> None:
+        for k, samples in (state or {}).items():
+            if k in self._intervals: self._arrivals[k] = deque((float(h) % 24 for h in samples), maxlen=ARRIVAL_SAMPLES)
+    def next_due(self, now: Optional[float] = None, wall: Optional[datetime] = None) -> float:
+        now = time.monotonic() if now is None else now
+        due = []
+        for k in self._intervals:
+            if k in self._retry_at: due.append(self._retry_at[k] - now)
+            elif k in self._fetched:
+                # O intervalo longo não pode saltar por cima da janela de chegada: acorda quando ela abre
+                delay = self._fetched[k] + self.interval(k, wall) - now
+                window = self.until_window(k, wall)
+                due.append(delay if window is None else min(delay, window))
+            else: due.append(0.0)
+        return max(0.0, min(due))
+    def jitter(self, delay: float) -> float:
+        # Só para a frente: acordar antes do prazo (backoff, _retry_at) deixa stale() vazio. O desvio fica
+        # dentro de metade da janela de chegada para não a saltar quando next_due acorda no seu início
+        span = min(delay * JITTER_FRACTION, ARRIVAL_WINDOW_H * 3600)
+        return delay + span * (self._offset + self._rng.random()) / 2
+    def first_delay(self, spread: timedelta = FIRST_POLL_SPREAD) -> float:
+        # Primeira atualização depois de um arranque: cada entrada cai no seu ponto do intervalo
+        return max(1.0, spread.total_seconds() * self._offset + self._rng.uniform(0, 5))
+    @property
+    def failures(self) -> int:
+        return max(self._failures.values(), default=0)
+    def as_dict(self, now: Optional[float] = None, wall: Optional[datetime] = None) -> Dict[str, Dict[str, object]]:
+        now = time.monotonic() if now is None else now
+        return {
+            k: {
+                "interval_s": round(self.interval(k, wall)),
+                "age_s": round(now - self._fetched[k]) if k in self._fetched else None,
+                "failures": self._failures.get(k, 0),
+                "retry_in_s": round(self._retry_at[k] - now) if k in self._retry_at else None,
+                "arrival_hour": None if (w := self.arrival_window(k)) is None else round(w, 2),
+            }
+            for k in self._intervals
+        }
@@ -0,0 +1,19 @@
+from __future__ import annotations
+import importlib
+import importlib.machinery
+import importlib.util
+import sys
+from pathlib import Path
+
+PACKAGE = "smsnet_aquamatrix"
+ROOT = Path(__file__).resolve().parent.parent
+
+def load(module: str):
+    # Regista a integração como pacote sem executar o __init__ (que importa o Home Assistant),
+    # para que os módulos sem dependências do HA (api, snapshot, throttle, ...) possam ser usados sozinhos
+    if PACKAGE not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(PACKAGE, None, is_package=True)
+        pkg = importlib.util.module_from_spec(spec)
+        pkg.__path__ = [str(ROOT)]
+        sys.modules[PACKAGE] = pkg
+    return importlib.import_module(f"{PACKAGE}.{module}")
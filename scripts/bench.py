@@ -0,0 +1,115 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from aiohttp import ClientSession, CookieJar
+from _bootstrap import load
+from mock_portal import MockPortal, PortalOptions
+
+api = load("api")
+snapshot = load("snapshot")
+throttle = load("throttle")
+
+THRESHOLDS = Path(__file__).with_name("bench_thresholds.json")
+_LOGGER = logging.getLogger("smsnet.bench")
+
+async def _refresh(client, keys: List[str]) -> Dict[str, Any]:
+    # Mesmo caminho que SMSNetCoordinator._async_update_data: prazo, fetch em paralelo e snapshot
+    with client.deadline(120):
+        results, errors = await client.fetch_endpoints(keys, 4)
+    snapshot.build_snapshot(results)
+    return {"ok": len(results), "errors": errors}
+
+async def _run(name: str, options: PortalOptions, accounts: int, refreshes: int,
+               between: Optional[Callable[[MockPortal], None]] = None, host: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    portal = MockPortal(options)
+    base = await portal.start()
+    sessions = [ClientSession(cookie_jar=CookieJar(unsafe=True)) for _ in range(accounts)]
+    # host: argumentos do HostThrottle partilhado ({} = o mesmo que a integração usa), None = sem throttle
+    host_throttle = throttle.HostThrottle(**host) if host is not None else None
+    breaker = throttle.CircuitBreaker() if host is not None else None
+    clients = [api.SMSNetClient(s, base, "SMSnet", f"user{i}@example.com", "secret", _LOGGER, throttle=host_throttle, breaker=breaker) for i, s in enumerate(sessions)]
+    keys = list(api.ENDPOINTS)
+    latencies: List[float] = []; failed = 0
+    tracemalloc.start()
+    try:
+        for n in range(refreshes):
+            if n and between is not None: between(portal)
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(*(_refresh(c, keys) for c in clients))
+            latencies.append(time.perf_counter() - started)
+            failed += sum(1 for o in outcomes if o["ok"] < len(keys))
+        _, peak = tracemalloc.get_traced_memory()
+        received = sum(c.metrics.bytes_total for c in clients)
+    finally:
+        tracemalloc.stop()
+        await asyncio.gather(*(s.close() for s in sessions))
+        await portal.stop()
+    total = accounts * refreshes
+    return {
+        "scenario": name,
+        "accounts": accounts,
+        "refreshes": refreshes,
+        "requests_per_refresh": round(portal.total_requests / total, 2),
+        "logins": portal.logins,
+        "bytes_per_refresh": round(received / total),
+        "refresh_latency_first_s": round(latencies[0], 3),
+        "refresh_latency_last_s": round(latencies[-1], 3),
+        "failed_refreshes": failed,
+        "peak_memory_kb": round(peak / 1024),
+        "requests": dict(portal.requests) if accounts == 1 else None,
+    }
+
+def _scenarios(args: argparse.Namespace):
+    lat = args.latency
+    yield "single_cold", PortalOptions(latency=lat), 1, 1, None, None
+    yield "single_warm", PortalOptions(latency=lat), 1, 3, None, None
+    yield "single_expired", PortalOptions(latency=lat), 1, 3, MockPortal.expire_sessions, None
+    yield "legacy_routes", PortalOptions(latency=lat, legacy_routes=True), 1, 3, None, None
+    yield "paired_tokens", PortalOptions(latency=lat, pair_tokens=True), 1, 3, None, None
+    yield "large_graph", PortalOptions(latency=lat, graph_months=2400), 1, 3, None, None
+    yield "flaky_5xx", PortalOptions(latency=lat, error_rate=0.2, seed=1), 1, 5, None, {}
+    yield "fleet", PortalOptions(latency=lat), args.accounts, 2, None, {"max_concurrency": 32, "rate": 0}
+    # Limites por omissão (4 em paralelo, 2 pedidos/s): a fila tem de caber no prazo da atualização
+    yield "fleet_throttled", PortalOptions(latency=lat), args.throttled_accounts, 1, None, {}
+
+def _check(results: List[Dict[str, Any]]) -> List[str]:
+    limits = json.loads(THRESHOLDS.read_text())
+    failures = []
+    for r in results:
+        for metric, limit in (limits.get(r["scenario"]) or {}).items():
+            if r.get(metric) is not None and r[metric] > limit:
+                failures.append(f"{r['scenario']}: {metric}={r[metric]} > {limit}")
+    return failures
+
+async def main(args: argparse.Namespace) -> int:
+    results = []
+    for name, options, accounts, refreshes, between, host in _scenarios(args):
+        if args.only and name not in args.only: continue
+        r = await _run(name, options, accounts, refreshes, between, host)
+        results.append(r)
+        if args.json: print(json.dumps(r))
+        else:
+            print(f"{name:16} accounts={accounts:<4} req/refresh={r['requests_per_refresh']:<6} logins={r['logins']:<4} bytes/refresh={r['bytes_per_refresh']:<7} "
+                  f"latency first={r['refresh_latency_first_s']}s last={r['refresh_latency_last_s']}s "
+                  f"failed={r['failed_refreshes']} peak_mem={r['peak_memory_kb']}KiB")
+    if not args.check: return 0
+    failures = _check(results)
+    for f in failures: print(f"REGRESSION {f}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for SMSNetClient against a mock SMSnet portal")
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--throttled-accounts", type=int, default=16, help="accounts in the fleet_throttled scenario (default host throttle, ~4.5 s per account)")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--only", nargs="*")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a metric exceeds bench_thresholds.json")
+    sys.exit(asyncio.run(main(parser.parse_args())))
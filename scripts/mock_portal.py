@@ -0,0 +1,178 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from aiohttp import web
+
+MONTHS = ("Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez")
+SESSION_COOKIE = ".AspNet.ApplicationCookie"
+FORM_COOKIE = "__RequestVerificationToken_Lw__"
+
+@dataclass
+class PortalOptions:
+    latency: float = 0.0
+    session_ttl: Optional[float] = None
+    error_rate: float = 0.0
+    graph_months: int = 24
+    legacy_routes: bool = False
+    pair_tokens: bool = False
+    page_padding: int = 20_000
+    seed: int = 0
+
+@dataclass
+class _Session:
+    user: str
+    created: float
+    page_token: str = field(default_factory=lambda: secrets.token_urlsafe(24))
+
+class MockPortal:
+    def __init__(self, options: Optional[PortalOptions] = None) -> None:
+        self.options = options or PortalOptions()
+        self.requests: Counter = Counter()
+        self.logins = 0
+        self._sessions: Dict[str, _Session] = {}
+        self._rng = random.Random(self.options.seed)
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get("/{tenant}/Account/Login", self._login_page)
+        self.app.router.add_post("/{tenant}/Account/Login", self._login_post)
+        self.app.router.add_get("/{tenant}/Home/Index", self._home)
+        self.app.router.add_get("/{tenant}/ReadingsAndConsumptions", self._readings_page)
+        self.app.router.add_get("/{tenant}/{area}/GetLastReadingInfo", self._last_reading)
+        self.app.router.add_get("/{tenant}/{area}/GetConsumptionsGraph", self._consumptions)
+        self.app.router.add_get("/{tenant}/Billing/GetBilledValuesGraph", self._billed)
+        self.app.router.add_get("/{tenant}/Billing/GetBillingInfo", self._billing_info)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sock = site._server.sockets[0]
+        self.base_url = f"http://{host}:{sock.getsockname()[1]}"
+        return self.base_url
+    async def stop(self) -> None:
+        if self._runner is not None: await self._runner.cleanup()
+    def expire_sessions(self) -> None:
+        self._sessions.clear()
+    def reset_counters(self) -> None:
+        self.requests.clear(); self.logins = 0
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests[f"{request.method} {request.path.split('/', 2)[-1]}"] += 1
+        if self.options.latency: await asyncio.sleep(self.options.latency)
+        if self.options.error_rate and self._rng.random() < self.options.error_rate:
+            return web.Response(status=503, text="<html>Service Unavailable</html>", content_type="text/html")
+        return await handler(request)
+    def _session(self, request: web.Request) -> Optional[_Session]:
+        sid = request.cookies.get(SESSION_COOKIE)
+        sess = self._sessions.get(sid or "")
+        if sess is None: return None
+        if self.options.session_ttl is not None and time.monotonic() - sess.created > self.options.session_ttl:
+            self._sessions.pop(sid, None); return None
+        return sess
+    def _to_login(self, request: web.Request) -> None:
+        raise web.HTTPFound(f"/{request.match_info['tenant']}/Account/Login")
+    async def _login_page(self, request: web.Request) -> web.Response:
+        form_token = secrets.token_urlsafe(24)
+        tenant = request.match_info["tenant"]
+        html = (
+            "<html><head><title>Login</title></head><body>"
+            + "<!-- " + "x" * self.options.page_padding + " -->"
+            + f'<form action="/{tenant}/Account/Login" method="post">'
+            + f'<input name="__RequestVerificationToken" type="hidden" value="{form_token}" />'
+            + '<input id="Email" name="Email" type="text" value="" />'
+            + '<input id="Password" name="Password" type="password" />'
+            + '<input id="RememberMe" name="RememberMe" type="checkbox" value="true" />'
+            + "</form>" + "<p>" + "y" * self.options.page_padding + "</p></body></html>"
+        )
+        resp = web.Response(text=html, content_type="text/html")
+        resp.set_cookie(FORM_COOKIE, form_token, path=f"/{tenant}")
+        return resp
+    async def _login_post(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        tenant = request.match_info["tenant"]
+        if not form.get("Email") or not form.get("Password") or form.get("__RequestVerificationToken") != request.cookies.get(FORM_COOKIE):
+            return await self._login_page(request)
+        self.logins += 1
+        sid = secrets.token_urlsafe(32)
+        self._sessions[sid] = _Session(user=str(form["Email"]), created=time.monotonic())
+        resp = web.HTTPFound(f"/{tenant}/Home/Index")
+        resp.set_cookie(SESSION_COOKIE, sid, path="/", httponly=True)
+        raise resp
+    async def _home(self, request: web.Request) -> web.Response:
+        if self._session(request) is None: self._to_login(request)
+        return web.Response(text="<html><body>Home</body></html>", content_type="text/html")
+    async def _readings_page(self, request: web.Request) -> web.Response:
+        sess = self._session(request)
+        if sess is None: self._to_login(request)
+        html = (
+            "<html><body>" + "<div>" + "z" * self.options.page_padding + "</div>"
+            + f'<form><input name="__RequestVerificationToken" type="hidden" value="{sess.page_token}" /></form>'
+            + "<div>" + "z" * self.options.page_padding + "</div></body></html>"
+        )
+        return web.Response(text=html, content_type="text/html")
+    def _check_ajax(self, request: web.Request) -> _Session:
+        sess = self._session(request)
+        if sess is None: self._to_login(request)
+        expected = sess.page_token
+        if self.options.pair_tokens: expected = f"{sess.page_token}:{request.cookies.get(FORM_COOKIE, '')}"
+        if request.headers.get("RequestVerificationToken") != expected:
+            raise web.HTTPBadRequest(text="The required anti-forgery header is not present.")
+        return sess
+    def _check_route(self, request: web.Request) -> None:
+        area = request.match_info["area"]
+        wanted = "Readings" if self.options.legacy_routes else "ReadingsAndConsumptions"
+        if area != wanted: raise web.HTTPNotFound()
+    def _series(self, offset: int = 0) -> Tuple[Tuple[str, float], ...]:
+        n = self.options.graph_months
+        out = []
+        for i in range(n):
+            back = n - 1 - i
+            year, month = 2025 - (back // 12), 12 - (back % 12)
+            out.append((f"{MONTHS[month - 1]}/{year % 100:02d}", round(5 + ((i + offset) * 37 % 11) * 0.5, 1)))
+        return tuple(out)
+    async def _last_reading(self, request: web.Request) -> web.Response:
+        self._check_route(request); self._check_ajax(request)
+        return web.json_response({"Value": "1 234,5", "LastReadingDate": "2025-12-28"})
+    async def _consumptions(self, request: web.Request) -> web.Response:
+        self._check_route(request); self._check_ajax(request)
+        return web.json_response({"Values": [{"Label": lbl, "FirstValue": str(v).replace(".", ",")} for lbl, v in self._series()]})
+    async def _billed(self, request: web.Request) -> web.Response:
+        self._check_ajax(request)
+        return web.json_response([{"Label": lbl, "Value": round(v * 2.1, 2)} for lbl, v in self._series(3)])
+    async def _billing_info(self, request: web.Request) -> web.Response:
+        self._check_ajax(request)
+        return web.json_response({"totalDebt": "12,34", "nextInvoice": {"limitDate": "2026-01-20"}})
+
+async def _serve(args: argparse.Namespace) -> None:
+    portal = MockPortal(PortalOptions(latency=args.latency, session_ttl=args.session_ttl, error_rate=args.error_rate, graph_months=args.graph_months, legacy_routes=args.legacy_routes, pair_tokens=args.pair_tokens))
+    url = await portal.start(port=args.port)
+    print(f"Mock SMSnet portal on {url}/<tenant>/Account/Login")
+    try:
+        while True:
+            await asyncio.sleep(30)
+            print(json.dumps({"requests": portal.total_requests, "logins": portal.logins}))
+    finally:
+        await portal.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the AQUAmatrix SMSnet portal")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--graph-months", type=int, default=24)
+    parser.add_argument("--legacy-routes", action="store_true")
+    parser.add_argument("--pair-tokens", action="store_true")
+    try: asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt: pass
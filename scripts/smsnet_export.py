@@ -0,0 +1,26 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from _bootstrap import load
+
+exporter = load("exporter")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export SMSnet consumption and billing history for many accounts, without Home Assistant")
+    parser.add_argument("accounts", help="CSV (tenant,username,password), JSON list or NDJSON file")
+    parser.add_argument("output", help="output file; NDJSON records or CSV rows, written as each account finishes")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--workers", type=int, default=exporter.DEFAULT_WORKERS)
+    parser.add_argument("--checkpoint", help="file of finished accounts; rerun with the same file to resume")
+    parser.add_argument("--base-url", default=exporter.DEFAULT_BASE_URL)
+    parser.add_argument("--max-concurrency", type=int, help="concurrent requests to the portal (default: --workers)")
+    parser.add_argument("--rate", type=float, help="requests per second to the portal (default: 2)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stats = asyncio.run(exporter.export(args.accounts, args.output, args.format, args.workers, args.checkpoint, args.base_url, args.max_concurrency, args.rate))
+    print(json.dumps(stats))
+    sys.exit(1 if stats["failed"] else 0)
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from datetime import timedelta
 from typing import Any
 from homeassistant.components.sensor import (
     SensorEntity,
@@ -6,15 +7,25 @@ from homeassistant.components.sensor import (
     SensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from .const import DOMAIN
-import datetime
-import re
-import logging
 
-Logger = logging.getLogger(__name__)
+# Só os sensores de diagnóstico (desativados por omissão) são atualizados por polling
+SCAN_INTERVAL = timedelta(minutes=5)
+
+METRIC_SENSORS = (
+    ("requests", "SMSnet - Pedidos ao portal", None, None, SensorStateClass.TOTAL_INCREASING, lambda m: m.requests),
+    ("request_errors", "SMSnet - Pedidos falhados", None, None, SensorStateClass.TOTAL_INCREASING, lambda m: m.errors),
+    ("request_latency_avg", "SMSnet - Latência média", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT, lambda m: m.latency_avg_ms),
+    ("last_refresh_duration", "SMSnet - Duração da última atualização", UnitOfTime.SECONDS, SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT, lambda m: None if m.last_refresh_s is None else round(m.last_refresh_s, 2)),
+    ("bytes_received", "SMSnet - Bytes recebidos", UnitOfInformation.BYTES, SensorDeviceClass.DATA_SIZE, SensorStateClass.TOTAL_INCREASING, lambda m: m.bytes_total),
+    ("token_refreshes", "SMSnet - Renovações de token", None, None, SensorStateClass.TOTAL_INCREASING, lambda m: m.counters["token_refreshes"]),
+    ("relogins", "SMSnet - Novos logins", None, None, SensorStateClass.TOTAL_INCREASING, lambda m: m.counters["relogins"]),
+    ("path_fallbacks", "SMSnet - Caminhos alternativos", None, None, SensorStateClass.TOTAL_INCREASING, lambda m: m.counters["path_fallbacks"]),
+)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     data = hass.data[DOMAIN][entry.entry_id]
@@ -52,6 +63,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         ),
         SMSnetSensor(coordinator, entry, tenant, "next_due_date", "Água - Próxima data limite", unit=None, device_class="date"),
     ]
+    entities += [SMSnetMetricSensor(data["client"], entry, *spec) for spec in METRIC_SENSORS]
     async_add_entities(entities)
 
 class SMSnetSensor(CoordinatorEntity, SensorEntity):
@@ -61,6 +73,7 @@ class SMSnetSensor(CoordinatorEntity, SensorEntity):
                  state_class: SensorStateClass | None = None) -> None:
         super().__init__(coordinator)
         self._key = key
+        self._last_available: bool | None = None
         self._attr_name = name
         self._attr_unique_id = f"{entry.entry_id}_{key}"
         self._attr_native_unit_of_measurement = unit
@@ -72,62 +85,31 @@ class SMSnetSensor(CoordinatorEntity, SensorEntity):
             "manufacturer": "Quinzico",
             "model": "SMSnet",
         }
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        data = self.coordinator.data; available = self.available
+        if data is not None and self._key not in data.changed and available == self._last_available: return
+        self._last_available = available
+        self.async_write_ha_state()
     @property
     def native_value(self) -> Any:
-        data = self.coordinator.data or {}
-        last = data.get("last_reading") or {}
-        cons = data.get("consumptions") or {}
-        billed = data.get("billed") or {}
-        billinfo = data.get("billing_info") or {}
-        if self._key == "last_reading_value":
-            v = last.get("Value") or last.get("LastReadingValue") or "0"
+        if self.coordinator.data is None: return None
+        return self.coordinator.data.get(self._key)
 
-            try:
-                parsed_str = re.sub(r'\s', '', str(v)).replace(',', ".")
-                return float(parsed_str)
-            except Exception:
-                Logger.error(f"Error parsing last reading value: {v}")
-                return None
-        if self._key == "last_reading_date":
-            v = last.get("LastReadingDate") or last.get("Date")
-            try: 
-                return datetime.strptime(v, "%Y-%m-%d").date()
-            except Exception: 
-                Logger.error(f"Error parsing last reading date: {v}")
-                return None
-        if self._key in ("consumption_current_month", "consumption_previous_month", "consumption_current_month_label"):
-            arr = []
-            if isinstance(cons, dict) and "Values" in cons: arr = cons.get("Values") or []
-            elif isinstance(cons, list): arr = cons
-            if not arr: return None
-            idx = -1 if self._key != "consumption_previous_month" else -2
-            try: item = arr[idx]
-            except Exception: return None
-            if self._key == "consumption_current_month_label": return item.get("Label", "")
-            val = item.get("FirstValue", item.get("Value", 0))
-            try: return float(str(val).replace(",", "."))
-            except Exception: return None
-        if self._key in ("billed_last_value", "billed_last_label"):
-            if not isinstance(billed, list) or not billed: return None
-            last_item = billed[-1]
-            if self._key == "billed_last_label": return last_item.get("Label", "")
-            val = last_item.get("Value", 0)
-            try: return float(str(val).replace(",", "."))
-            except Exception: return None
-        if self._key == "debt_total":
-            for k in ("totalDebt", "valorEmDivida", "debt", "TotalDebt", "ValorEmDivida"):
-                if k in billinfo:
-                    try: return float(str(billinfo[k]).replace(",", "."))
-                    except Exception: return None
-            inv = billinfo.get("nextInvoice") or billinfo.get("proximaFatura") or {}
-            for k in ("debt", "valor", "amount"):
-                if k in inv:
-                    try: return float(str(inv[k]).replace(",", "."))
-                    except Exception: return None
-            return None
-        if self._key == "next_due_date":
-            inv = billinfo.get("nextInvoice") or billinfo.get("proximaFatura") or {}
-            v = inv.get("limitDate") or inv.get("dataLimite") or billinfo.get("limitDate") or billinfo.get("dataLimite")
-            try: return datetime.strptime(v, "%Y-%m-%d").date()
-            except Exception: return None
-        return None
+class SMSnetMetricSensor(SensorEntity):
+    _attr_has_entity_name = False
+    _attr_should_poll = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    def __init__(self, client, entry, key: str, name: str, unit: str | None, device_class: SensorDeviceClass | None, state_class: SensorStateClass, value_fn) -> None:
+        self._metrics = client.metrics
+        self._value_fn = value_fn
+        self._attr_name = name
+        self._attr_unique_id = f"{entry.entry_id}_metric_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_device_info = {"identifiers": {(DOMAIN, entry.entry_id)}}
+    @property
+    def native_value(self) -> Any:
+        return self._value_fn(self._metrics)
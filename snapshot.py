@@ -0,0 +1,109 @@
+from __future__ import annotations
+import hashlib
+import json
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+_WS = re.compile(r"\s")
+_MONTHS_PT = {"jan": 1, "fev": 2, "feb": 2, "mar": 3, "abr": 4, "apr": 4, "mai": 5, "may": 5, "jun": 6, "jul": 7, "ago": 8, "aug": 8, "set": 9, "sep": 9, "out": 10, "oct": 10, "nov": 11, "dez": 12, "dec": 12}
+_DMY = re.compile(r"\b\d{1,2}[-/.](\d{1,2})[-/.](\d{4}|\d{2})\b")
+_YM = re.compile(r"(\d{4})[-/.](\d{1,2})")
+_MY = re.compile(r"\b(\d{1,2})[-/.](\d{4})\b")
+_MY_SHORT = re.compile(r"\b(\d{1,2})[-/.](\d{2})\b")
+_NAMED = re.compile(r"([a-zç]{3})[a-zç]*\.?[\s/-]*(\d{4}|\d{2})\b", re.I)
+DEBT_KEYS = ("totalDebt", "valorEmDivida", "debt", "TotalDebt", "ValorEmDivida")
+INVOICE_DEBT_KEYS = ("debt", "valor", "amount")
+
+def _to_float(v: Any) -> float:
+    return float(_WS.sub("", str(v)).replace(",", "."))
+
+def _to_date(v: Any) -> date:
+    return datetime.strptime(str(v)[:10], "%Y-%m-%d").date()
+
+def fingerprint(payload: Any) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+def parse_month_label(label: Any) -> Optional[Tuple[int, int]]:
+    text = str(label or "").strip()
+    # Datas completas primeiro: em "01.12.2025" o "01.12" não é mês/ano
+    if m := _DMY.search(text): month, year = int(m.group(1)), int(m.group(2))
+    elif m := _YM.search(text): year, month = int(m.group(1)), int(m.group(2))
+    elif m := _MY.search(text) or _MY_SHORT.search(text): month, year = int(m.group(1)), int(m.group(2))
+    else:
+        m = _NAMED.search(text)
+        if not m or m.group(1).lower() not in _MONTHS_PT: return None
+        month, year = _MONTHS_PT[m.group(1).lower()], int(m.group(2))
+    if year < 100: year += 2000
+    return (year, month) if 1 <= month <= 12 else None
+
+def monthly_series(payload: Any, value_keys: Tuple[str, ...]) -> List[Tuple[Tuple[int, int], float]]:
+    arr: List[Any] = []
+    if isinstance(payload, dict): arr = payload.get("Values") or []
+    elif isinstance(payload, list): arr = payload
+    series: Dict[Tuple[int, int], float] = {}
+    for item in arr:
+        if not isinstance(item, dict): continue
+        month = parse_month_label(item.get("Label"))
+        raw = next((item[k] for k in value_keys if k in item), None)
+        if month is None or raw is None: continue
+        try: series[month] = _to_float(raw)
+        except ValueError: continue
+    return sorted(series.items())
+
+class SMSNetSnapshot:
+    FIELDS = (
+        "last_reading_value", "last_reading_date",
+        "consumption_current_month", "consumption_previous_month", "consumption_current_month_label",
+        "billed_last_value", "billed_last_label",
+        "debt_total", "next_due_date",
+    )
+    __slots__ = FIELDS + ("errors", "changed")
+    def __init__(self) -> None:
+        for name in self.FIELDS: setattr(self, name, None)
+        self.errors: Dict[str, str] = {}
+        self.changed: frozenset = frozenset(self.FIELDS)
+    def get(self, key: str) -> Any:
+        return getattr(self, key, None)
+    def diff(self, previous: Optional[SMSNetSnapshot]) -> None:
+        if previous is None: self.changed = frozenset(self.FIELDS); return
+        self.changed = frozenset(k for k in self.FIELDS if getattr(self, k) != getattr(previous, k))
+
+def build_snapshot(data: Dict[str, Any]) -> SMSNetSnapshot:
+    snap = SMSNetSnapshot()
+    last = data.get("last_reading") or {}
+    cons = data.get("consumptions") or {}
+    billed = data.get("billed") or {}
+    billinfo = data.get("billing_info") or {}
+    def parse(key: str, conv, v: Any) -> Optional[Any]:
+        try: return conv(v)
+        except Exception:
+            snap.errors[key] = f"could not parse {v!r}"; return None
+    if isinstance(last, dict) and last:
+        snap.last_reading_value = parse("last_reading_value", _to_float, last.get("Value") or last.get("LastReadingValue") or "0")
+        v = last.get("LastReadingDate") or last.get("Date")
+        snap.last_reading_date = parse("last_reading_date", _to_date, v) if v else None
+    arr = []
+    if isinstance(cons, dict) and "Values" in cons: arr = cons.get("Values") or []
+    elif isinstance(cons, list): arr = cons
+    if arr:
+        item = arr[-1]
+        snap.consumption_current_month_label = item.get("Label", "")
+        snap.consumption_current_month = parse("consumption_current_month", _to_float, item.get("FirstValue", item.get("Value", 0)))
+        if len(arr) > 1:
+            prev = arr[-2]
+            snap.consumption_previous_month = parse("consumption_previous_month", _to_float, prev.get("FirstValue", prev.get("Value", 0)))
+    if isinstance(billed, list) and billed:
+        item = billed[-1]
+        snap.billed_last_label = item.get("Label", "")
+        snap.billed_last_value = parse("billed_last_value", _to_float, item.get("Value", 0))
+    if isinstance(billinfo, dict) and billinfo:
+        inv = billinfo.get("nextInvoice") or billinfo.get("proximaFatura") or {}
+        k = next((k for k in DEBT_KEYS if k in billinfo), None)
+        if k is not None: snap.debt_total = parse("debt_total", _to_float, billinfo[k])
+        else:
+            k = next((k for k in INVOICE_DEBT_KEYS if k in inv), None)
+            if k is not None: snap.debt_total = parse("debt_total", _to_float, inv[k])
+        v = inv.get("limitDate") or inv.get("dataLimite") or billinfo.get("limitDate") or billinfo.get("dataLimite")
+        if v: snap.next_due_date = parse("next_due_date", _to_date, v)
+    return snap
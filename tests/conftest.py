@@ -0,0 +1,21 @@
+from __future__ import annotations
+import sys
+from pathlib import Path
+import pytest
+
+# Os testes cobrem só os módulos sem dependências do Home Assistant, carregados como no bench
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+class FakeClock:
+    def __init__(self, start: float = 1000.0) -> None:
+        self.now = start
+    def __call__(self) -> float:
+        return self.now
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr("time.monotonic", fake)
+    return fake
@@ -0,0 +1,31 @@
+from __future__ import annotations
+import asyncio
+import pytest
+from _bootstrap import load
+
+api = load("api")
+
+class FailingPortalClient(api.SMSNetClient):
+    def __init__(self) -> None:
+        super().__init__(None, "https://portal.invalid", "SMSnet", "user", "secret", None)
+        self.login_calls = 0
+    async def _login(self) -> None:
+        self.login_calls += 1
+        await asyncio.sleep(0.01)
+        raise api.SMSNetServerError("POST Account/Login failed: 503")
+
+def test_failed_reauth_is_shared_by_waiters():
+    async def run() -> FailingPortalClient:
+        client = FailingPortalClient(); gen = client.auth_generation
+        outcomes = await asyncio.gather(*(client._reauth(gen, full=True) for _ in range(4)), return_exceptions=True)
+        assert all(isinstance(o, api.SMSNetServerError) for o in outcomes)
+        return client
+    assert asyncio.run(run()).login_calls == 1
+
+def test_new_reauth_after_failure_tries_again():
+    async def run() -> FailingPortalClient:
+        client = FailingPortalClient(); gen = client.auth_generation
+        for _ in range(2):
+            with pytest.raises(api.SMSNetServerError): await client._reauth(gen, full=True)
+        return client
+    assert asyncio.run(run()).login_calls == 2
@@ -0,0 +1,35 @@
+from __future__ import annotations
+from _bootstrap import load
+
+api = load("api")
+PATHS = ["ReadingsAndConsumptions/GetLastReadingInfo", "Readings/GetLastReadingInfo"]
+
+def test_order_keeps_declared_order_when_empty(clock):
+    assert api.RouteCache().order(PATHS) == PATHS
+
+def test_good_path_goes_first(clock):
+    routes = api.RouteCache()
+    routes.mark_good(PATHS, PATHS[1])
+    assert routes.order(PATHS) == [PATHS[1], PATHS[0]]
+
+def test_good_path_expires_after_ttl(clock):
+    routes = api.RouteCache(ttl=60)
+    routes.mark_good(PATHS, PATHS[1])
+    clock.advance(61)
+    assert routes.order(PATHS) == PATHS
+    assert routes.as_dict()["resolved"] == {}
+
+def test_bad_path_moves_last_until_negative_ttl(clock):
+    routes = api.RouteCache(negative_ttl=30)
+    routes.mark_bad(PATHS, PATHS[0])
+    assert routes.order(PATHS) == [PATHS[1], PATHS[0]]
+    clock.advance(31)
+    assert routes.order(PATHS) == PATHS
+
+def test_mark_bad_drops_resolved_path(clock):
+    routes = api.RouteCache()
+    routes.mark_good(PATHS, PATHS[1])
+    routes.mark_bad(PATHS, PATHS[1])
+    assert routes.order(PATHS) == [PATHS[0], PATHS[1]]
+    routes.mark_good(PATHS, PATHS[1])
+    assert routes.as_dict()["failed"] == {}
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from datetime import datetime, timedelta, timezone
+import pytest
+from _bootstrap import load
+
+scheduler = load("scheduler")
+H = 3600.0
+
+def wall(day: int, hour: int, minute: int = 0) -> datetime:
+    return datetime(2026, 3, day, hour, minute, tzinfo=timezone.utc)
+
+def make(**intervals: float) -> "scheduler.RefreshScheduler":
+    return scheduler.RefreshScheduler({k: timedelta(hours=v) for k, v in intervals.items()}, seed="tenant:user")
+
+def learned(key: str = "reading", hour: int = 8) -> "scheduler.RefreshScheduler":
+    s = make(**{key: 12})
+    for day in (1, 2, 3): s.observe_arrival(key, wall(day, hour))
+    return s
+
+def test_stale_until_fetched_then_after_interval():
+    s = make(reading=12, billed=168)
+    assert s.stale(now=0, wall=wall(4, 12)) == ["reading", "billed"]
+    s.mark_fetched(["reading", "billed"], now=0)
+    assert s.stale(now=11 * H, wall=wall(4, 12)) == []
+    assert s.stale(now=12 * H, wall=wall(4, 12)) == ["reading"]
+
+def test_backoff_doubles_per_failure_and_resets():
+    s = make(reading=12)
+    s.mark_failed(["reading"], now=0)
+    assert s.next_due(now=0, wall=wall(4, 12)) == pytest.approx(600)
+    assert s.stale(now=599, wall=wall(4, 12)) == []
+    s.mark_failed(["reading"], now=600)
+    assert s.next_due(now=600, wall=wall(4, 12)) == pytest.approx(1200)
+    assert s.failures == 2
+    s.mark_fetched(["reading"], now=1800)
+    assert s.failures == 0
+
+def test_arrival_window_is_circular_mean():
+    s = make(reading=12)
+    s.observe_arrival("reading", wall(1, 23))
+    s.observe_arrival("reading", wall(2, 1))
+    assert min(s.arrival_window("reading"), 24 - s.arrival_window("reading")) == pytest.approx(0, abs=1e-6)
+
+def test_fast_interval_inside_window():
+    s = learned()
+    assert s.interval("reading", wall(4, 8, 30)) == scheduler.FAST_INTERVAL.total_seconds()
+    assert s.interval("reading", wall(4, 14)) == 12 * H
+
+def test_next_due_wakes_at_window_start():
+    s = learned()
+    s.mark_fetched(["reading"], now=0)
+    # Busca às 20h: o intervalo de 12h acabaria às 8h, mas a janela abre às 6h30
+    assert s.next_due(now=0, wall=wall(4, 20)) == pytest.approx(10.5 * H, abs=60)
+    assert s.stale(now=10.5 * H, wall=wall(5, 6, 30)) == ["reading"]
+
+def test_next_due_skips_window_while_quiet():
+    s = learned()
+    s.mark_fetched(["reading"], now=0)
+    s.quiet_until("reading", wall(5, 0))
+    assert s.until_window("reading", wall(4, 9)) == pytest.approx(21.5 * H, abs=60)
+    assert s.next_due(now=0, wall=wall(4, 9)) == pytest.approx(12 * H)
+
+def test_arrivals_survive_export_restore():
+    s = learned()
+    other = make(reading=12)
+    other.restore_arrivals(s.export_arrivals())
+    assert other.arrival_window("reading") == pytest.approx(s.arrival_window("reading"))
+    other.restore_arrivals({"unknown": [1.0, 2.0]})
+    assert "unknown" not in other.export_arrivals()
+
+def test_first_delay_is_spread_per_entry():
+    delays = {scheduler.RefreshScheduler({"r": timedelta(hours=1)}, seed=f"t:{i}").first_delay() for i in range(20)}
+    assert all(1.0 <= d <= scheduler.FIRST_POLL_SPREAD.total_seconds() + 5 for d in delays)
+    assert max(delays) - min(delays) > 30
+
+def test_jitter_never_wakes_early():
+    for i in range(50):
+        s = scheduler.RefreshScheduler({"r": timedelta(hours=12)}, seed=f"t:{i}")
+        s.mark_failed(["r"], now=0)
+        due = s.next_due(now=0, wall=wall(4, 12))
+        delay = s.jitter(due)
+        assert due <= delay <= 1.1 * due
+        assert s.stale(now=delay, wall=wall(4, 12)) == ["r"]
+
+def test_jitter_stays_inside_arrival_window():
+    s = make(reading=12)
+    for _ in range(100):
+        assert 20 * H <= s.jitter(20 * H) <= 20 * H + scheduler.ARRIVAL_WINDOW_H * H
@@ -0,0 +1,34 @@
+from __future__ import annotations
+import pytest
+from _bootstrap import load
+
+snapshot = load("snapshot")
+
+@pytest.mark.parametrize("label, expected", [
+    ("2025-12", (2025, 12)),
+    ("2025/3", (2025, 3)),
+    ("2025-12-01T00:00:00", (2025, 12)),
+    ("12/2025", (2025, 12)),
+    ("3-2025", (2025, 3)),
+    ("12/25", (2025, 12)),
+    ("01.12.2025", (2025, 12)),
+    ("15/03/2024", (2024, 3)),
+    ("01/12/25", (2025, 12)),
+    ("Dez 2025", (2025, 12)),
+    ("março/24", (2024, 3)),
+    ("Set. 2023", (2023, 9)),
+    ("13/2025", None),
+    ("", None),
+    (None, None),
+    ("Total", None),
+])
+def test_parse_month_label(label, expected):
+    assert snapshot.parse_month_label(label) == expected
+
+def test_monthly_series_sorts_and_skips_unparsed():
+    payload = [
+        {"Label": "02/2025", "Value": "1,5"},
+        {"Label": "01.01.2025", "Value": "2"},
+        {"Label": "Total", "Value": "9"},
+    ]
+    assert snapshot.monthly_series(payload, ("Value",)) == [((2025, 1), 2.0), ((2025, 2), 1.5)]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import asyncio
+from _bootstrap import load
+
+throttle = load("throttle")
+
+def test_round_robin_between_owners():
+    async def run() -> list:
+        host = throttle.HostThrottle(max_concurrency=1, rate=0)
+        order = []
+        async def call(owner: str) -> None:
+            async with host.slot(owner):
+                order.append(owner); await asyncio.sleep(0)
+        await asyncio.gather(*(call("a") for _ in range(6)), *(call("b") for _ in range(2)))
+        return order
+    assert asyncio.run(run()) == ["a", "a", "b", "a", "b", "a", "a", "a"]
+
+def test_concurrency_limit():
+    async def run() -> int:
+        host = throttle.HostThrottle(max_concurrency=2, rate=0)
+        active = peak = 0
+        async def call(owner: str) -> None:
+            nonlocal active, peak
+            async with host.slot(owner):
+                active += 1; peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+        await asyncio.gather(*(call(f"o{i % 3}") for i in range(9)))
+        assert host.as_dict()["active"] == 0 and host.queue_depth == 0
+        return peak
+    assert asyncio.run(run()) == 2
+
+def test_rate_spacing():
+    async def run() -> list:
+        host = throttle.HostThrottle(max_concurrency=4, rate=20)
+        loop = asyncio.get_running_loop(); starts = []
+        async def call() -> None:
+            async with host.slot("a"): starts.append(loop.time())
+        await asyncio.gather(*(call() for _ in range(4)))
+        return starts
+    starts = asyncio.run(run())
+    assert all(b - a >= 0.045 for a, b in zip(starts, starts[1:]))
+
+def test_rate_wait_does_not_hold_a_slot():
+    async def run() -> None:
+        host = throttle.HostThrottle(max_concurrency=1, rate=5)
+        async with host.slot("a"): pass
+        waiter = asyncio.ensure_future(_enter(host, "b"))
+        await asyncio.sleep(0.05)
+        # À espera do ritmo, mas sem lugar ocupado
+        assert host.as_dict()["active"] == 0 and host.queue_depth == 1
+        await waiter
+    asyncio.run(run())
+
+def test_cancelled_waiter_does_not_reserve_start():
+    async def run() -> float:
+        host = throttle.HostThrottle(max_concurrency=4, rate=4)
+        loop = asyncio.get_running_loop()
+        async with host.slot("a"): first = loop.time()
+        cancelled = asyncio.ensure_future(_enter(host, "b"))
+        await asyncio.sleep(0.05); cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert host.queue_depth == 0 and host.as_dict()["active"] == 0
+        await _enter(host, "c")
+        return loop.time() - first
+    # O lugar de "b" não foi gasto: "c" sai no intervalo seguinte (0,25 s), não dois intervalos depois
+    assert asyncio.run(run()) < 0.4
+
+def test_reused_across_event_loops():
+    host = throttle.HostThrottle(max_concurrency=1, rate=10)
+    async def burst() -> None:
+        await asyncio.gather(*(_enter(host, "a") for _ in range(3)))
+    asyncio.run(burst())
+    asyncio.run(asyncio.wait_for(burst(), 2))
+
+async def _enter(host, owner: str) -> None:
+    async with host.slot(owner): pass
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = throttle.CircuitBreaker(threshold=2, cooldown=10)
+    breaker.record_failure(); assert breaker.allow()
+    breaker.record_failure(); assert breaker.state == breaker.OPEN
+    assert not breaker.allow()
+    assert breaker.as_dict()["rejected"] == 1
+
+def test_breaker_half_open_single_probe(clock):
+    breaker = throttle.CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    clock.advance(10)
+    assert breaker.allow() and breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and not breaker.allow()
+    clock.advance(10)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED and breaker.allow() and breaker.allow()
+
+def test_breaker_abandoned_probe_frees_half_open(clock):
+    breaker = throttle.CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure(); clock.advance(10)
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()
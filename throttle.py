@@ -0,0 +1,137 @@
+from __future__ import annotations
+import asyncio
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+MAX_HOST_CONCURRENCY = 4
+HOST_REQUESTS_PER_SECOND = 2.0
+SERVICE_ESTIMATE = 1.0
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 120.0
+
+class HostThrottle:
+    def __init__(self, max_concurrency: int = MAX_HOST_CONCURRENCY, rate: float = HOST_REQUESTS_PER_SECOND) -> None:
+        self._max = max_concurrency
+        self._spacing = 1.0 / rate if rate else 0.0
+        self._active = 0
+        self._next_start = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._refreshing: Counter = Counter()
+        self._service = SERVICE_ESTIMATE
+        self._requests = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+    @asynccontextmanager
+    async def slot(self, owner: str) -> AsyncIterator[None]:
+        loop = asyncio.get_running_loop(); queued_at = loop.time()
+        fut = loop.create_future()
+        self._queues.setdefault(owner, deque()).append(fut)
+        self._dispatch()
+        try: await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled(): self._release()
+            else: self._discard(owner, fut)
+            raise
+        started = loop.time()
+        try:
+            waited = started - queued_at
+            self._requests += 1; self._wait_total += waited; self._wait_max = max(self._wait_max, waited)
+            yield
+        finally:
+            self._service += 0.2 * (loop.time() - started - self._service)
+            self._release()
+    def _dispatch(self) -> None:
+        # Round-robin entre contas: cada dono com pedidos em fila recebe uma vez por volta.
+        # A espera pelo ritmo é feita ainda na fila: o pedido só ocupa um lugar e reserva o arranque
+        # quando sai de facto, por isso um cancelamento durante a espera não desperdiça nenhum dos dois
+        while self._active < self._max and self._queues:
+            if self._spacing:
+                loop = asyncio.get_running_loop(); now = loop.time()
+                if now < self._next_start:
+                    if self._timer is None or self._timer.when() < self._next_start:
+                        self._timer = loop.call_at(self._next_start, self._on_timer)
+                    return
+            owner, queue = next(iter(self._queues.items()))
+            fut = queue.popleft()
+            if queue: self._queues.move_to_end(owner)
+            else: del self._queues[owner]
+            if fut.done(): continue
+            self._active += 1
+            if self._spacing: self._next_start = now + self._spacing
+            fut.set_result(None)
+    def _on_timer(self) -> None:
+        self._timer = None; self._dispatch()
+    def _release(self) -> None:
+        self._active -= 1; self._dispatch()
+    def _discard(self, owner: str, fut: asyncio.Future) -> None:
+        queue = self._queues.get(owner)
+        if queue is None: return
+        try: queue.remove(fut)
+        except ValueError: return
+        if not queue: del self._queues[owner]
+    def begin_refresh(self, owner: str) -> None:
+        self._refreshing[owner] += 1
+    def end_refresh(self, owner: str) -> None:
+        self._refreshing[owner] -= 1
+        if self._refreshing[owner] <= 0: del self._refreshing[owner]
+    def allowance(self, requests: int) -> float:
+        # Tempo que uma atualização de `requests` pedidos pode ficar na fila enquanto todas as contas
+        # em curso são servidas à vez, limitado pelo ritmo ou pela concorrência (o que for mais lento)
+        per_request = max(self._spacing, self._service / self._max)
+        return len(self._refreshing) * requests * per_request
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self._max,
+            "requests_per_second": round(1.0 / self._spacing, 3) if self._spacing else None,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "queued_owners": len(self._queues),
+            "refreshing_owners": len(self._refreshing),
+            "service_avg_s": round(self._service, 3),
+            "requests": self._requests,
+            "wait_avg_s": round(self._wait_total / self._requests, 3) if self._requests else 0.0,
+            "wait_max_s": round(self._wait_max, 3),
+        }
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN) -> None:
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._rejected = 0
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self._cooldown:
+                self._rejected += 1; return False
+            self.state = self.HALF_OPEN; self._probing = False
+        if self.state == self.HALF_OPEN:
+            # Meio-aberto: só um pedido de teste de cada vez
+            if self._probing:
+                self._rejected += 1; return False
+            self._probing = True
+        return True
+    def record_success(self) -> None:
+        self.state = self.CLOSED; self._failures = 0; self._probing = False
+    def record_failure(self) -> None:
+        self._failures += 1; self._probing = False
+        if self.state == self.HALF_OPEN or self._failures >= self._threshold:
+            self.state = self.OPEN; self._opened_at = time.monotonic()
+    def abandon(self) -> None:
+        self._probing = False
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "open_for_s": round(max(0.0, self._cooldown - (time.monotonic() - self._opened_at)), 1) if self.state == self.OPEN else None,
+            "rejected": self._rejected,
+        }